@@ -1,13 +1,36 @@
-from flask import Flask, jsonify, request
-from flasgger import Swagger
+from src import startup
+from flask import Flask, Response, jsonify, request, stream_with_context
 from src.db_connection import get_connection
 from src.fetch_countries import (
     get_countries,
     get_country_by_name,
     delete_country_by_name,
     get_status,
-    fetch_and_store_countries
+    get_countries_page,
+    get_country_stats,
+    get_countries_by_names,
+    delete_countries_by_names,
+    STATS_GROUPS,
+    fetch_and_store_countries,
+    refresh_countries_incremental,
+    get_shared_version,
+    refreshed_within,
+    refresh_in_progress,
+    normalize_query,
+    parse_fields
 )
+from src.responses import cached_json_response
+from src.name_index import normalize_name
+from src.export import EXPORT_FORMATS, export_countries
+from src import metrics
+from src.db_connection import get_pool_stats
+from src.cache import query_cache
+from src.jobs import refresh_queue
+from src.scheduler import start_scheduler, REFRESH_INTERVAL
+from src.dataset import VersionWatcher
+from src.image_generator import get_summary_image, request_render, IMAGE_MAX_AGE
+
+startup.checkpoint("imports")
 
 app = Flask(__name__)
 
@@ -37,7 +60,32 @@ swagger_template = {
     }
 }
 
-swagger = Swagger(app, config=swagger_config, template=swagger_template)
+if startup.PRODUCTION:
+    # Flasgger is imported and the spec built on the first /docs or /apispec.json hit
+    from src.docs import LazyDocs
+    swagger = LazyDocs(app, swagger_config, swagger_template)
+else:
+    from flasgger import Swagger
+    swagger = Swagger(app, config=swagger_config, template=swagger_template)
+
+# Per-route latency, DB time and query counts for /metrics
+metrics.install_request_metrics(app)
+metrics.register_gauge("db_pool_connections", "Pool connections by state",
+                       lambda: {(k,): v for k, v in get_pool_stats().items()
+                                if k in ("open", "idle", "checked_out")}, ("state",))
+metrics.register_gauge("db_pool_events_total",
+                       "Pool checkouts, creations, recycles, invalidations, waits, timeouts and leaked checkouts",
+                       lambda: {(k,): v for k, v in get_pool_stats().items()
+                                if k in ("checkouts", "created", "recycled", "invalidated", "waits", "timeouts",
+                                         "leaked")},
+                       ("event",), kind="counter")
+metrics.register_gauge("query_cache_lookups_total", "Query cache lookups by result",
+                       lambda: {("hit",): query_cache.hits, ("miss",): query_cache.misses},
+                       ("result",), kind="counter")
+
+# With several worker processes, pick up writes made by the others (DATASET_POLL_INTERVAL)
+version_watcher = VersionWatcher(get_shared_version)
+version_watcher.install(app)
 
 # -----------------------------
 # Root Route
@@ -59,8 +107,15 @@ def home():
         "endpoints": {
             "/countries": "Get all countries (with optional filters)",
             "/countries/<name>": "Get or delete a specific country",
-            "/refresh": "Fetch and refresh countries from external APIs",
-            "/status": "Check database and refresh status"
+            "/countries/batch": "Look up several countries in one request",
+            "/countries/batch/delete": "Delete several countries in one transaction",
+            "/countries/image": "Summary image of the dataset",
+            "/countries/export": "Stream the dataset as JSON, NDJSON or CSV",
+            "/countries/stats/<region|currency>": "Aggregates per region or currency",
+            "/refresh": "Queue a refresh of countries from external APIs",
+            "/refresh/<job_id>": "Refresh job status and progress",
+            "/status": "Check database and refresh status",
+            "/metrics": "Prometheus metrics"
         }
     }), 200
 
@@ -89,27 +144,310 @@ def list_countries():
         in: query
         type: string
         required: false
-        description: Sort field (name, population)
+        description: Sort order (gdp_asc, gdp_desc, name_asc, name_desc, population_asc, population_desc)
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma-separated columns to return, e.g. name,population
+      - name: limit
+        in: query
+        type: integer
+        minimum: 1
+        required: false
+        description: Page size; when set (or with cursor) the response is a page object
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: next_cursor value from the previous page
+    responses:
+      200:
+        description: List of countries, or a page object when limit/cursor is given
+        schema:
+          type: object
+          properties:
+            data:
+              type: array
+              items:
+                type: object
+            next_cursor:
+              type: string
+            limit:
+              type: integer
+      304:
+        description: Not modified (If-None-Match matched the ETag)
+      400:
+        description: Invalid fields, limit or cursor
+    """
+    region = request.args.get("region")
+    currency = request.args.get("currency")
+    sort = request.args.get("sort")
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    try:
+        fields = parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if limit is not None or cursor:
+        try:
+            limit = int(limit) if limit is not None else 50
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+
+    if limit is None and not cursor:
+        key = ("countries", normalize_query(region, currency, sort), fields)
+        return cached_json_response(key, lambda: (get_countries(region, currency, sort, fields), 200))
+
+    def build():
+        try:
+            return get_countries_page(region, currency, sort, fields, limit, cursor), 200
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+    key = ("countries_page", normalize_query(region, currency, sort), fields, limit, cursor)
+    return cached_json_response(key, build)
+
+# -----------------------------
+# Streaming Export
+# -----------------------------
+@app.route("/countries/export", methods=["GET"])
+def export():
+    """
+    Stream the full (optionally filtered) countries dataset
+    ---
+    tags:
+      - Countries
+    parameters:
+      - name: format
+        in: query
+        type: string
+        required: false
+        description: json (default), ndjson or csv
+      - name: region
+        in: query
+        type: string
+        required: false
+        description: Filter by region
+      - name: currency
+        in: query
+        type: string
+        required: false
+        description: Filter by currency
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: Sort order (gdp_asc, gdp_desc, name_asc, name_desc, population_asc, population_desc)
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma-separated columns to return
     responses:
       200:
-        description: List of countries
+        description: Streamed JSON array, NDJSON lines or CSV
+      400:
+        description: Unknown format or fields
+    """
+    fmt = request.args.get("format", "json")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unknown format '{fmt}'"}), 400
+    try:
+        fields = parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    chunks = export_countries(fmt, request.args.get("region"), request.args.get("currency"),
+                              request.args.get("sort"), fields)
+    response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    if fmt == "csv":
+        response.headers["Content-Disposition"] = "attachment; filename=countries.csv"
+    return response
+
+# -----------------------------
+# Aggregate Statistics
+# -----------------------------
+@app.route("/countries/stats/<group_by>", methods=["GET"])
+def country_stats(group_by):
+    """
+    Country count, total population and total estimated GDP per region or currency
+    ---
+    tags:
+      - Countries
+    parameters:
+      - name: group_by
+        in: path
+        type: string
+        required: true
+        enum: [region, currency]
+        description: Group by region or by currency code
+    responses:
+      200:
+        description: One entry per group
         schema:
           type: array
           items:
             type: object
             properties:
-              name:
-                type: string
-              capital:
+              countries:
+                type: integer
+              total_population:
+                type: integer
+              total_estimated_gdp:
+                type: number
+      304:
+        description: Not modified (If-None-Match matched the ETag)
+      404:
+        description: Unknown grouping
+    """
+    if group_by not in STATS_GROUPS:
+        return jsonify({"error": f"Unknown grouping '{group_by}', use region or currency"}), 404
+    return cached_json_response(("stats", group_by), lambda: (get_country_stats(group_by), 200))
+
+# -----------------------------
+# Summary Image
+# -----------------------------
+@app.route("/countries/image", methods=["GET"])
+def summary_image():
+    """
+    Get the summary image (total countries, last refresh, top 5 by GDP)
+    ---
+    tags:
+      - Countries
+    produces:
+      - image/png
+    responses:
+      200:
+        description: PNG summary image
+      304:
+        description: Not modified (If-None-Match matched the ETag)
+      404:
+        description: Summary image not rendered yet
+    """
+    png, etag = get_summary_image()
+    if png is None:
+        return jsonify({"error": "Summary image not found"}), 404
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(png, mimetype="image/png")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={IMAGE_MAX_AGE}"
+    return response
+
+# -----------------------------
+# Batch Lookup and Delete
+# -----------------------------
+def _batch_names():
+    body = request.get_json(silent=True)
+    return body.get("names") if isinstance(body, dict) else None
+
+@app.route("/countries/batch", methods=["POST"])
+def batch_lookup():
+    """
+    Look up several countries by name, ISO code or alias in one request
+    ---
+    tags:
+      - Countries
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            names:
+              type: array
+              minItems: 1
+              items:
                 type: string
-              region:
+              example: ["Nigeria", "GH", "usa"]
+    responses:
+      200:
+        description: One result per requested name, in request order
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  name:
+                    type: string
+                  status:
+                    type: string
+                    enum: [found, not_found]
+                  country:
+                    type: object
+            found:
+              type: integer
+            not_found:
+              type: integer
+      400:
+        description: names missing, empty, not a list of strings or longer than BATCH_MAX_NAMES
+    """
+    try:
+        matches = get_countries_by_names(_batch_names())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    results = [{"name": name, "status": "found", "country": country} if country
+               else {"name": name, "status": "not_found"}
+               for name, country in matches]
+    found = sum(1 for _, country in matches if country)
+    return jsonify({"results": results, "found": found, "not_found": len(matches) - found}), 200
+
+@app.route("/countries/batch/delete", methods=["POST"])
+def batch_delete():
+    """
+    Delete several countries by name in one transaction
+    ---
+    tags:
+      - Countries
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            names:
+              type: array
+              minItems: 1
+              items:
                 type: string
+              example: ["Nigeria", "Ghana"]
+    responses:
+      200:
+        description: One result per requested name, in request order
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  name:
+                    type: string
+                  status:
+                    type: string
+                    enum: [deleted, not_found]
+            deleted:
+              type: integer
+            not_found:
+              type: integer
+      400:
+        description: names missing, empty, not a list of strings or longer than BATCH_MAX_NAMES
     """
-    region = request.args.get("region")
-    currency = request.args.get("currency")
-    sort = request.args.get("sort")
-    data = get_countries(region, currency, sort)
-    return jsonify(data), 200
+    try:
+        outcomes = delete_countries_by_names(_batch_names())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    results = [{"name": name, "status": "deleted" if deleted else "not_found"} for name, deleted in outcomes]
+    deleted = sum(1 for _, ok in outcomes if ok)
+    return jsonify({"results": results, "deleted": deleted, "not_found": len(outcomes) - deleted}), 200
 
 # -----------------------------
 # Get Country by Name
@@ -117,7 +455,7 @@ def list_countries():
 @app.route("/countries/<name>", methods=["GET"])
 def get_country(name):
     """
-    Get a specific country by name
+    Get a specific country by name, ISO alpha-2/alpha-3 code or common alias
     ---
     tags:
       - Countries
@@ -126,7 +464,7 @@ def get_country(name):
         in: path
         type: string
         required: true
-        description: Country name
+        description: Country name (case and accents ignored), ISO code (NG, NGA) or alias (USA, UK)
     responses:
       200:
         description: Country found
@@ -139,13 +477,18 @@ def get_country(name):
               type: string
             region:
               type: string
+      304:
+        description: Not modified (If-None-Match matched the ETag)
       404:
         description: Country not found
     """
-    country = get_country_by_name(name)
-    if country:
-        return jsonify(country), 200
-    return jsonify({"error": "Country not found"}), 404
+    def build():
+        country = get_country_by_name(name)
+        if country:
+            return country, 200
+        return {"error": "Country not found"}, 404
+
+    return cached_json_response(("country", normalize_name(name)), build)
 
 # -----------------------------
 # Delete Country by Name
@@ -182,24 +525,82 @@ def delete_country(name):
 # -----------------------------
 # Refresh Countries
 # -----------------------------
+def with_image_render(task):
+    """Queue a summary image render in the background once a refresh succeeds."""
+    def run(progress):
+        result = task(progress)
+        if result.get("success"):
+            request_render()
+        return result
+    return run
+
+REFRESH_MODES = {
+    "full": with_image_render(fetch_and_store_countries),
+    "incremental": with_image_render(refresh_countries_incremental),
+}
+
 @app.route("/refresh", methods=["POST"])
 def refresh_data():
     """
-    Refresh countries from external APIs
+    Queue a refresh of countries from external APIs
     ---
     tags:
       - Admin
+    parameters:
+      - name: mode
+        in: query
+        type: string
+        required: false
+        description: full (default, rebuild and swap the table) or incremental (write only changed countries)
+    responses:
+      202:
+        description: Refresh job queued, or the already running job it was merged into
+        schema:
+          type: object
+          properties:
+            job_id:
+              type: string
+            status:
+              type: string
+            status_url:
+              type: string
+            merged:
+              type: boolean
+    """
+    mode = request.args.get("mode", "full")
+    if mode not in REFRESH_MODES:
+        return jsonify({"error": f"Unknown refresh mode '{mode}'"}), 400
+    job, created = refresh_queue.submit(REFRESH_MODES[mode], mode=mode)
+    return jsonify({
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/refresh/{job['job_id']}",
+        "merged": not created,
+    }), 202
+
+@app.route("/refresh/<job_id>", methods=["GET"])
+def refresh_status(job_id):
+    """
+    Get the status and progress of a refresh job
+    ---
+    tags:
+      - Admin
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+        description: Job id returned by POST /refresh
     responses:
       200:
-        description: Countries refreshed successfully
-      500:
-        description: Error occurred during refresh
+        description: Job status with fetched, inserted, failed and duration counters
+      404:
+        description: Unknown job id
     """
-    try:
-        fetch_and_store_countries()
-        return jsonify({"message": "Countries refreshed successfully!"}), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    job = refresh_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Refresh job not found"}), 404
+    return jsonify(job), 200
 
 # -----------------------------
 # Status
@@ -218,8 +619,42 @@ def status():
           type: object
     """
     info = get_status()
+    info["startup"] = startup.report()
     return jsonify(info), 200
 
+def start_background_tasks():
+    """Periodic incremental refresh, enabled with REFRESH_INTERVAL=<seconds>."""
+    # Every worker runs a scheduler and they tick together. Ticks that do get
+    # through merge into one job via the shared job store; the rest are skipped
+    # while any process refreshes, or right after one has.
+    start_scheduler(refresh_queue, REFRESH_MODES["incremental"],
+                    skip_if=lambda: refresh_queue.has_active() or refresh_in_progress()
+                    or refreshed_within(REFRESH_INTERVAL / 2))
+
+# Under the pre-forking server threads must not exist before the fork; each worker starts them (gunicorn.conf.py)
+if not startup.PREFORK:
+    start_background_tasks()
+
+# -----------------------------
+# Metrics
+# -----------------------------
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """
+    Prometheus metrics
+    ---
+    tags:
+      - Admin
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Metrics in the Prometheus text exposition format
+    """
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+startup.checkpoint("app_setup")
+
 # -----------------------------
 # Run Server
 # -----------------------------
@@ -227,4 +662,4 @@ import os
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    app.run(host="0.0.0.0", port=port, debug=not startup.PRODUCTION)
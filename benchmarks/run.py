@@ -0,0 +1,297 @@
+"""
+Latency and throughput benchmarks for the Countries API.
+
+    python -m benchmarks.run                   # run every scenario and print a report
+    python -m benchmarks.run --save-baseline   # store the results in benchmarks/baseline.json
+    python -m benchmarks.run --compare         # exit 1 if p95 or req/s regressed past --tolerance
+
+By default the app runs in-process against a local MySQL (the DB_* settings,
+with DB_NAME replaced by BENCH_DB_NAME, default countries_bench) and a stub
+restcountries/exchange-rate server from benchmarks/stub_upstream.py. With
+--url the requests go to an already running server instead.
+
+The SQL uses MySQL-only features (RENAME TABLE swaps, ON DUPLICATE KEY
+UPDATE, named locks), so SQLite cannot stand in; a throwaway container works:
+
+    docker run -d -p 3306:3306 -e MYSQL_ROOT_PASSWORD=bench mysql:8
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_upstream import REAL_COUNTRIES, REGIONS, start_stub_server
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+NAME_VARIANTS = [name for name, *_ in REAL_COUNTRIES] + [
+    "nigeria", "NIGERIA", "cote d'ivoire", "usa", "UK", "NGA", "gh", "Country 100", "Atlantis",
+]
+CURRENCIES = [code for *_, code in REAL_COUNTRIES]
+SORTS = [None, "gdp_desc", "gdp_asc", "name_asc"]
+
+
+# -----------------------------
+# Traffic
+# -----------------------------
+def _query(params):
+    pairs = [f"{k}={v}" for k, v in params.items() if v]
+    return "?" + "&".join(pairs) if pairs else ""
+
+
+def countries_filtered(rng):
+    params = {"sort": rng.choice(SORTS)}
+    if rng.random() < 0.6:
+        params["region"] = rng.choice(REGIONS)
+    if rng.random() < 0.3:
+        params["currency"] = rng.choice(CURRENCIES)
+    return "GET", "/countries" + _query(params)
+
+
+def countries_page(rng):
+    params = {"sort": rng.choice(SORTS), "limit": rng.choice([10, 50]), "fields": "name,population,estimated_gdp"}
+    return "GET", "/countries" + _query(params)
+
+
+def country_by_name(rng):
+    return "GET", "/countries/" + rng.choice(NAME_VARIANTS)
+
+
+def status(rng):
+    return "GET", "/status"
+
+
+def stats(rng):
+    return "GET", "/countries/stats/" + rng.choice(["region", "currency"])
+
+
+def refresh(rng):
+    return "POST", "/refresh?mode=incremental"
+
+
+# scenario -> [(weight, request builder)]
+SCENARIOS = {
+    "countries_filtered": [(1, countries_filtered)],
+    "countries_page": [(1, countries_page)],
+    "country_by_name": [(1, country_by_name)],
+    "status": [(1, status)],
+    "stats": [(1, stats)],
+    "refresh": [(1, refresh)],
+    "mix": [
+        (40, countries_filtered),
+        (10, countries_page),
+        (30, country_by_name),
+        (10, status),
+        (8, stats),
+        (2, refresh),
+    ],
+}
+
+
+def _picker(mix, rng):
+    weights = [w for w, _ in mix]
+    builders = [b for _, b in mix]
+    return lambda: rng.choices(builders, weights)[0](rng)
+
+
+# -----------------------------
+# Clients
+# -----------------------------
+class InProcessClient:
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path):
+        response = self._client.open(path, method=method)
+        return response.status_code
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        import requests
+        self._session = requests.Session()
+        self._base_url = base_url.rstrip("/")
+
+    def request(self, method, path):
+        return self._session.request(method, self._base_url + path, timeout=30).status_code
+
+
+# -----------------------------
+# DB query counter
+# -----------------------------
+class QuestionCounter:
+    """Counts statements via MySQL's global Questions counter (approximate if other clients are active)."""
+
+    def __init__(self):
+        from src.db_connection import _connect
+        self._conn = _connect()
+
+    def read(self):
+        cursor = self._conn.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        value = int(cursor.fetchone()[1])
+        cursor.close()
+        return value
+
+    def close(self):
+        self._conn.close()
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def run_scenario(name, make_client, total, concurrency, counter=None, seed=0):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = iter(range(total))
+
+    def worker(worker_id):
+        nonlocal errors
+        client = make_client()
+        pick = _picker(SCENARIOS[name], random.Random(seed * 1000 + worker_id))
+        local, local_errors = [], 0
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            method, path = pick()
+            started = time.perf_counter()
+            try:
+                status_code = client.request(method, path)
+                if status_code >= 500:
+                    local_errors += 1
+            except Exception:
+                local_errors += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    questions_before = counter.read() if counter else None
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    # The SHOW STATUS issued by read() counts as one question itself
+    queries = counter.read() - questions_before - 1 if counter else None
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "db_queries_per_request": round(queries / len(latencies), 2) if queries is not None and latencies else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against the stored baseline."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base.get("p95_ms") and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if base.get("rps") and current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']} req/s vs baseline {base['rps']} req/s")
+    return regressions
+
+
+def print_report(results):
+    header = f"{'scenario':<20}{'reqs':>7}{'errs':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        q = "-" if r["db_queries_per_request"] is None else r["db_queries_per_request"]
+        print(f"{name:<20}{r['requests']:>7}{r['errors']:>6}{r['rps']:>10}{r['p50_ms']:>10}"
+              f"{r['p95_ms']:>10}{r['p99_ms']:>10}{q:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Countries API")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=50, help="untimed requests per scenario")
+    parser.add_argument("--countries", type=int, default=250, help="countries served by the stub")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression, 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    counter = None
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        # Configure before importing the app: settings are read at import time
+        _, countries_url, rates_url = start_stub_server(args.countries)
+        os.environ["COUNTRIES_API_URL"] = countries_url
+        os.environ["EXCHANGE_RATES_URL"] = rates_url
+        os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME", "countries_bench")
+        # Keep stub snapshots, the spec and the summary image out of the real cache/
+        os.environ["SNAPSHOT_DIR"] = tempfile.mkdtemp(prefix="countries-bench-")
+
+        from src.db_connection import initialize_db
+        from src.fetch_countries import fetch_and_store_countries
+        from app import app
+
+        initialize_db()
+        seeded = fetch_and_store_countries()
+        if not seeded["success"]:
+            sys.exit(f"Seeding the benchmark database failed: {seeded.get('error')}")
+        make_client = lambda: InProcessClient(app)
+        counter = QuestionCounter()
+
+    results = {}
+    for i, name in enumerate(args.scenarios):
+        if args.warmup:
+            run_scenario(name, make_client, args.warmup, args.concurrency, seed=i + 100)
+        results[name] = run_scenario(name, make_client, args.requests, args.concurrency, counter, seed=i)
+    if counter:
+        counter.close()
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+
+    if args.compare:
+        if not os.path.exists(BASELINE_PATH):
+            sys.exit("No baseline stored yet; run with --save-baseline first")
+        with open(BASELINE_PATH) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
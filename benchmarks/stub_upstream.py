@@ -0,0 +1,87 @@
+"""Local stand-ins for restcountries and the exchange-rate API, used by the benchmarks."""
+import json
+import random
+import string
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LETTERS = string.ascii_uppercase
+REGIONS = ["Africa", "Americas", "Asia", "Europe", "Oceania", "Polar"]
+REAL_COUNTRIES = [
+    ("Nigeria", "NG", "NGA", "Africa", "NGN"),
+    ("Ghana", "GH", "GHA", "Africa", "GHS"),
+    ("Kenya", "KE", "KEN", "Africa", "KES"),
+    ("United States of America", "US", "USA", "Americas", "USD"),
+    ("Brazil", "BR", "BRA", "Americas", "BRL"),
+    ("United Kingdom of Great Britain and Northern Ireland", "GB", "GBR", "Europe", "GBP"),
+    ("Germany", "DE", "DEU", "Europe", "EUR"),
+    ("France", "FR", "FRA", "Europe", "EUR"),
+    ("Japan", "JP", "JPN", "Asia", "JPY"),
+    ("India", "IN", "IND", "Asia", "INR"),
+    ("Côte d'Ivoire", "CI", "CIV", "Africa", "XOF"),
+    ("Australia", "AU", "AUS", "Oceania", "AUD"),
+]
+
+
+def build_countries(total=250, seed=42):
+    """Deterministic restcountries-v2 shaped payload of `total` countries."""
+    rng = random.Random(seed)
+    currencies = [code for *_, code in REAL_COUNTRIES] + [f"C{i:02d}" for i in range(60)]
+    countries = []
+    for i in range(total):
+        if i < len(REAL_COUNTRIES):
+            name, alpha2, alpha3, region, code = REAL_COUNTRIES[i]
+        else:
+            name = f"Country {i:03d}"
+            # Q-prefixed alpha-3 codes are reserved for user assignment, so they never clash
+            alpha2, alpha3 = None, f"Q{LETTERS[i // 26]}{LETTERS[i % 26]}"
+            region, code = rng.choice(REGIONS), rng.choice(currencies)
+        countries.append({
+            "name": name,
+            "capital": f"{name} City",
+            "region": region,
+            "population": rng.randint(10_000, 300_000_000),
+            "flag": f"https://flagcdn.example/{alpha3.lower()}.svg",
+            "currencies": [] if i % 97 == 96 else [{"code": code, "name": f"{code} currency", "symbol": "$"}],
+            "alpha2Code": alpha2,
+            "alpha3Code": alpha3,
+        })
+    return countries
+
+
+def build_rates(countries, seed=7):
+    rng = random.Random(seed)
+    codes = {c["code"] for country in countries for c in country["currencies"]}
+    return {"result": "success", "base_code": "USD",
+            "rates": {code: round(rng.uniform(0.2, 2000), 4) for code in sorted(codes)}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    routes = {}
+
+    def do_GET(self):
+        body = self.routes.get(self.path.split("?")[0])
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(total=250, port=0):
+    """Start the stub in a daemon thread; returns (server, countries_url, rates_url)."""
+    countries = build_countries(total)
+    handler = type("StubHandler", (_Handler,), {"routes": {
+        "/v2/all": json.dumps(countries).encode(),
+        "/v6/latest/USD": json.dumps(build_rates(countries)).encode(),
+    }})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name="stub-upstream", daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, f"{base}/v2/all", f"{base}/v6/latest/USD"
@@ -0,0 +1,15 @@
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.getenv("WEB_THREADS", 4))  # > 1 uses the threaded (gthread) worker
+timeout = int(os.getenv("WEB_TIMEOUT", 60))
+
+# Import the app and load the dataset once in the master, then fork
+preload_app = True
+
+
+def post_fork(server, worker):
+    from app import start_background_tasks
+    start_background_tasks()
@@ -1,11 +1,23 @@
 from app import app
+from src import startup
 from src.db_connection import initialize_db
-from pyngrok import ngrok
+from src.fetch_countries import seed_from_snapshot
 import os
 
+# Tunnel for demos; off by default in production (APP_ENV=production)
+USE_NGROK = os.getenv("NGROK", "false" if startup.PRODUCTION else "true").lower() == "true"
+
 initialize_db()
+startup.checkpoint("initialize_db")
+seed_from_snapshot()  # empty table + local snapshot: serve data before the first refresh
+startup.checkpoint("seed_from_snapshot")
 port = int(os.environ.get("PORT", 5000))
-public_url = ngrok.connect(port)
-print(f"Ngrok URL: {public_url}/docs/")
+if USE_NGROK:
+    from pyngrok import ngrok
+    public_url = ngrok.connect(port)
+    print(f"Ngrok URL: {public_url}/docs/")
+    startup.checkpoint("ngrok")
 
+startup.mark_ready()
+startup.print_report()
 app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 128))  # max cached result sets
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 300))  # seconds
+
+# -----------------------------
+# Dataset Version
+# -----------------------------
+# Bumped on every write (refresh, delete). Cached entries remember the version
+# they were built from and are ignored once it moves on.
+_dataset_version = 0
+_version_lock = threading.Lock()
+
+
+def get_dataset_version():
+    return _dataset_version
+
+
+def bump_dataset_version():
+    global _dataset_version
+    with _version_lock:
+        _dataset_version += 1
+        return _dataset_version
+
+
+# -----------------------------
+# Query Result Cache
+# -----------------------------
+class QueryCache:
+    """LRU + TTL cache for query results, invalidated by the dataset version."""
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (version, expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """Return (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires_at, value = entry
+                if entry_version == version and time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, version):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+            }
+
+
+query_cache = QueryCache()
@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+from src.cache import bump_dataset_version
+from src.name_index import NameIndex
+from src.startup import PRODUCTION
+
+# Seconds between checks of the shared dataset version, 0 = off (single process)
+DATASET_POLL_INTERVAL = float(os.getenv("DATASET_POLL_INTERVAL", 2 if PRODUCTION else 0))
+
+
+class DatasetSnapshot:
+    """
+    The whole dataset, read once and never modified afterwards.
+
+    Loaded in the server's master process before workers fork, its pages stay
+    shared copy-on-write between them until a worker swaps in a newer one.
+    With a ColumnarTable the per-row dicts are not kept: rows is the table,
+    and name lookups rebuild the one row they return from its columns.
+    """
+
+    __slots__ = ("rows", "name_index", "table", "loaded_at")
+
+    def __init__(self, rows, table=None):
+        self.rows = table if table is not None else rows
+        self.name_index = NameIndex(self.rows)
+        self.table = table  # ColumnarTable when QUERY_ENGINE=memory
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class VersionWatcher:
+    """
+    Keeps this process in step with writes made by other processes.
+
+    Every write bumps dataset_meta.version in the database; check() reads it
+    at most once per interval and bumps the local dataset version when it has
+    moved, which drops cached queries, responses and the dataset snapshot.
+    """
+
+    def __init__(self, read_version, interval=DATASET_POLL_INTERVAL):
+        self.read_version = read_version
+        self.interval = interval
+        self.seen = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def check(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        # One thread polls; the others carry on with what they have
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            self._next_check = now + self.interval
+            version = self.read_version()
+            if self.seen is not None and version != self.seen:
+                bump_dataset_version()
+            self.seen = version
+        except Exception as e:
+            print(f"⚠️ Could not read the shared dataset version: {e}")
+        finally:
+            self._lock.release()
+
+    def install(self, app):
+        """Check before requests when polling is enabled."""
+        if self.interval > 0:
+            app.before_request(lambda: self.check())
@@ -1,6 +1,11 @@
 import mysql.connector
+from mysql.connector import errors
 import os
+import threading
+import time
+import weakref
 from dotenv import load_dotenv
+from src import metrics
 
 load_dotenv()
 
@@ -9,7 +14,17 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
-def get_connection():
+# -----------------------------
+# Pool Configuration
+# -----------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))                  # idle connections kept open
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 10))  # extra connections allowed under bursts
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))          # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))          # seconds idle before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def _connect():
     return mysql.connector.connect(
         host=DB_HOST,
         user=DB_USER,
@@ -17,6 +32,245 @@ def get_connection():
         database=DB_NAME
     )
 
+
+class InstrumentedCursor:
+    """Cursor proxy that reports each statement's latency to src.metrics."""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def _timed(self, method, operation, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            verb = operation.split(None, 1)[0].upper() if operation.strip() else "UNKNOWN"
+            metrics.record_query(verb, time.perf_counter() - started)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._raw.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._raw.executemany, operation, *args, **kwargs)
+
+
+class PooledConnection:
+    """Proxy around a raw connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        # Dropped without close() (e.g. an exception skipped it): discard the
+        # connection and free its slot instead of losing it for good
+        self._finalizer = weakref.finalize(self, pool.reclaim, raw)
+        self._finalizer.atexit = False
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise errors.OperationalError("Connection already returned to the pool")
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.__getattr__("cursor")(*args, **kwargs))
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._finalizer.detach()
+            self._pool.release(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, connect, size=DB_POOL_SIZE, max_overflow=DB_POOL_MAX_OVERFLOW,
+                 timeout=DB_POOL_TIMEOUT, recycle=DB_POOL_RECYCLE, pre_ping=DB_POOL_PRE_PING):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = []   # (raw_connection, returned_at), most recently used last
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "invalidated": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "leaked": 0,
+        }
+
+    def acquire(self):
+        started = time.perf_counter()
+        try:
+            return self._acquire()
+        finally:
+            metrics.DB_ACQUIRE_LATENCY.observe(time.perf_counter() - started)
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    raw, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise errors.PoolError(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.size}, overflow {self.max_overflow})"
+                    )
+                self._stats["waits"] += 1
+                self._cond.wait(remaining)
+            self._stats["checkouts"] += 1
+
+        if raw is not None:
+            raw = self._check_alive(raw, returned_at)
+
+        if raw is None:
+            try:
+                raw = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats["created"] += 1
+
+        return PooledConnection(self, raw)
+
+    def _check_alive(self, raw, returned_at):
+        """Return raw if it is still usable, otherwise close it and return None."""
+        if self.recycle and time.monotonic() - returned_at > self.recycle:
+            self._discard(raw)
+            with self._cond:
+                self._stats["recycled"] += 1
+            return None
+        if self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                self._discard(raw)
+                with self._cond:
+                    self._stats["invalidated"] += 1
+                return None
+        return raw
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def release(self, raw):
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            # Broken connection: drop it and free its slot
+            self._discard(raw)
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            if len(self._idle) < self.size:
+                self._idle.append((raw, time.monotonic()))
+                raw = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+        if raw is not None:
+            self._discard(raw)
+
+    def reclaim(self, raw):
+        """Called for a checked-out connection whose proxy was garbage collected unclosed."""
+        self._discard(raw)
+        with self._cond:
+            self._open -= 1
+            self._stats["leaked"] += 1
+            self._cond.notify()
+
+    def dispose(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for raw, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "checked_out": self._open - len(self._idle),
+                **self._stats,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect)
+    return _pool
+
+
+def get_connection():
+    return get_pool().acquire()
+
+
+_inherited_pools = []
+
+
+def _reset_pool_after_fork():
+    # A forked worker must not reuse the parent's sockets, nor close them: closing
+    # shuts down the socket the parent still uses. Keep them referenced, start fresh.
+    global _pool, _pool_lock
+    if _pool is not None:
+        _inherited_pools.append(_pool)
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+def get_pool_stats():
+    return get_pool().stats()
+
+
 def initialize_db():
     conn = mysql.connector.connect(
         host=DB_HOST,
@@ -27,15 +281,11 @@ def initialize_db():
 
     cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
     cursor.execute(f"USE {DB_NAME}")
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS countries (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            currency VARCHAR(255) NOT NULL
-        )
-    """)
-    
-    conn.commit()
     cursor.close()
-    conn.close()
+
+    # Schema changes live in src/migrations.py; already-applied versions are skipped
+    from src.migrations import run_migrations
+    try:
+        run_migrations(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,135 @@
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+from flask import Response, current_app, send_from_directory
+from src.responses import EncodedBody, dumps, make_etag
+from src.upstream import SNAPSHOT_DIR
+
+APISPEC_CACHE_PATH = os.path.join(SNAPSHOT_DIR, "apispec.json")
+
+_DOCS_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>{title}</title>
+  <link rel="stylesheet" href="{static}/swagger-ui.css">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="{static}/swagger-ui-bundle.js"></script>
+  <script src="{static}/swagger-ui-standalone-preset.js"></script>
+  <script>
+    window.ui = SwaggerUIBundle({{
+      url: "{spec_route}",
+      dom_id: "#swagger-ui",
+      presets: [SwaggerUIBundle.presets.apis, SwaggerUIStandalonePreset],
+      layout: "StandaloneLayout"
+    }});
+  </script>
+</body>
+</html>
+"""
+
+
+def _flasgger_static_dir():
+    # find_spec locates the package without importing it
+    package_dir = importlib.util.find_spec("flasgger").submodule_search_locations[0]
+    return os.path.join(package_dir, "ui3", "static")
+
+
+def _flasgger_version():
+    try:
+        return importlib.metadata.version("flasgger")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+class LazyDocs:
+    """
+    Swagger UI and spec for production starts, without importing Flasgger at boot.
+
+    The /apispec.json, /docs/ and static routes are registered up front (Flask
+    refuses new routes once it has served a request), but the spec is only
+    built on the first hit. It is then kept in memory and written to
+    APISPEC_CACHE_PATH, keyed by a fingerprint of the routes, their
+    docstrings, the template, the config and the Flasgger version, so later
+    processes load it from disk instead of parsing YAML.
+    """
+
+    def __init__(self, app, config, template):
+        self.app = app
+        self.config = config
+        self.template = template
+        self._spec = None
+        self._body = None
+        self._lock = threading.Lock()
+
+        spec_route = config["specs"][0]["route"]
+        static_url = config.get("static_url_path", "/flasgger_static")
+        page = _DOCS_PAGE.format(title=template["info"]["title"], static=static_url, spec_route=spec_route)
+
+        app.add_url_rule(spec_route, "apispec", self._spec_view)
+        app.add_url_rule(config.get("specs_route", "/apidocs/"), "apidocs",
+                         lambda: Response(page, mimetype="text/html"))
+        app.add_url_rule(static_url + "/<path:filename>", "flasgger_static",
+                         lambda filename: send_from_directory(_flasgger_static_dir(), filename))
+
+    def _fingerprint(self):
+        digest = hashlib.sha1()
+        # The template and config shape the spec too (title, version, ...), and so does Flasgger
+        # itself; filter callables in the config are keyed by name, not by their per-process repr
+        settings = {"template": self.template, "config": self.config, "flasgger": _flasgger_version()}
+        digest.update(json.dumps(settings, sort_keys=True, ensure_ascii=False,
+                                 default=lambda o: getattr(o, "__qualname__", type(o).__name__)).encode("utf-8"))
+        for rule in sorted(self.app.url_map.iter_rules(), key=lambda r: (r.rule, r.endpoint)):
+            view = self.app.view_functions.get(rule.endpoint)
+            digest.update(f"{rule.rule}|{sorted(rule.methods)}|{getattr(view, '__doc__', None)}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _load_cached(self, fingerprint):
+        try:
+            with open(APISPEC_CACHE_PATH) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cached["spec"] if cached.get("fingerprint") == fingerprint else None
+
+    def _store(self, fingerprint, spec):
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".json.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"fingerprint": fingerprint, "spec": spec}, f)
+        os.replace(tmp_path, APISPEC_CACHE_PATH)
+
+    def _build(self):
+        from flasgger import Swagger
+        swagger = Swagger(config=self.config, template=self.template)
+        swagger.app = self.app
+        swagger.load_config(self.app)
+        # Round-trip through JSON to drop the defaultdicts and lambdas Flasgger leaves around
+        return json.loads(json.dumps(swagger.get_apispecs(self.config["specs"][0]["endpoint"])))
+
+    def get_spec(self):
+        if self._spec is None:
+            with self._lock:
+                if self._spec is None:
+                    fingerprint = self._fingerprint()
+                    spec = self._load_cached(fingerprint)
+                    if spec is None:
+                        spec = self._build()
+                        try:
+                            self._store(fingerprint, spec)
+                        except OSError as e:
+                            current_app.logger.warning("Could not cache the API spec: %s", e)
+                    self._spec = spec
+        return self._spec
+
+    def _spec_view(self):
+        if self._body is None:
+            body = dumps(self.get_spec())
+            self._body = EncodedBody(body, etag="spec-" + make_etag(body))
+        return self._body.to_response()
@@ -0,0 +1,74 @@
+import os
+import random
+import threading
+import time
+from src import metrics
+from src.upstream import request_with_retries, has_snapshot, load_snapshot, save_snapshot
+
+EXCHANGE_RATES_URL = os.getenv("EXCHANGE_RATES_URL", "https://open.er-api.com/v6/latest/USD")
+EXCHANGE_RATES_TTL = int(os.getenv("EXCHANGE_RATES_TTL", 3600))  # seconds
+
+# fetched_at is only set by a live fetch: rates loaded from the snapshot stay
+# stale, so the next call retries the source (monotonic() may start near 0)
+_cache = {"rates": None, "fetched_at": float("-inf")}
+_lock = threading.Lock()
+
+
+def get_exchange_rates(force=False, offline=False):
+    """
+    Return a {currency_code: rate_against_USD} dict, fetched in one bulk call
+    and cached for EXCHANGE_RATES_TTL seconds. If the source is down, the last
+    cached rates are used even when stale, then the on-disk snapshot.
+    offline=True never calls the source.
+    """
+    with _lock:
+        if offline:
+            if _cache["rates"] is None:
+                _cache["rates"] = load_snapshot("exchange_rates")
+            return _cache["rates"]
+
+        fresh = time.monotonic() - _cache["fetched_at"] < EXCHANGE_RATES_TTL
+        if _cache["rates"] is not None and fresh and not force:
+            return _cache["rates"]
+
+        started = time.perf_counter()
+        try:
+            response = request_with_retries(EXCHANGE_RATES_URL)
+            response.raise_for_status()
+            rates = response.json().get("rates")
+            if not rates:
+                raise ValueError("exchange rate response has no rates")
+        except Exception:
+            metrics.UPSTREAM_FETCH.observe(time.perf_counter() - started, "exchange_rates", "failure")
+            if _cache["rates"] is not None:
+                return _cache["rates"]
+            if has_snapshot("exchange_rates"):
+                # Cold start with the rates API down: use the last good rates on disk
+                _cache["rates"] = load_snapshot("exchange_rates")
+                return _cache["rates"]
+            raise
+        metrics.UPSTREAM_FETCH.observe(time.perf_counter() - started, "exchange_rates", "success")
+
+        save_snapshot("exchange_rates", rates, {"url": EXCHANGE_RATES_URL})
+        _cache["rates"] = rates
+        _cache["fetched_at"] = time.monotonic()
+        return rates
+
+
+def compute_gdp(populations, currency_codes, rates):
+    """
+    Compute exchange_rate and estimated_gdp columns for a whole batch.
+
+    estimated_gdp = population * random(1000-2000) / exchange_rate. Countries
+    without a currency get 0; currencies missing from the rates get None.
+    """
+    exchange_rates = [rates.get(code) if code else None for code in currency_codes]
+    multipliers = [random.uniform(1000, 2000) for _ in populations]
+    estimated_gdps = [
+        0 if not code else
+        None if not rate or population is None else
+        population * multiplier / rate
+        for population, code, rate, multiplier
+        in zip(populations, currency_codes, exchange_rates, multipliers)
+    ]
+    return exchange_rates, estimated_gdps
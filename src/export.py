@@ -0,0 +1,59 @@
+import csv
+import io
+from src.fetch_countries import COUNTRY_FIELDS, iter_countries
+from src.responses import dumps
+
+EXPORT_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_json(rows, batch_size=100):
+    yield b"["
+    first = True
+    for batch in _batched(rows, batch_size):
+        body = b",".join(dumps(row) for row in batch)
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def stream_ndjson(rows, batch_size=100):
+    for batch in _batched(rows, batch_size):
+        yield b"".join(dumps(row) + b"\n" for row in batch)
+
+
+def stream_csv(rows, columns, batch_size=100):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batched(rows, batch_size):
+        writer.writerows([row.get(c) for c in columns] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_countries(fmt, region=None, currency=None, sort=None, fields=None):
+    """Return a generator of encoded chunks for the whole (filtered) dataset in fmt."""
+    rows = iter_countries(region, currency, sort, fields)
+    if fmt == "ndjson":
+        return stream_ndjson(rows)
+    if fmt == "csv":
+        return stream_csv(rows, list(fields or COUNTRY_FIELDS))
+    return stream_json(rows)
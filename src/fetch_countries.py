@@ -1,62 +1,444 @@
-from src.db_connection import get_connection
+import base64
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import mysql.connector
+from src import metrics
+from src.db_connection import get_connection, get_pool_stats
+from src.cache import query_cache, get_dataset_version, bump_dataset_version
+from src.exchange_rates import get_exchange_rates, compute_gdp
+from src.dataset import DatasetSnapshot
+from src.name_index import normalize_name
+from src.query_engine import QUERY_ENGINE, ColumnarTable
+from src.upstream import fetch_countries, has_snapshot
 
-def fetch_and_store_countries():
-    import requests
-    conn = get_connection()
-    cursor = conn.cursor()
+COUNTRIES_API_URL = os.getenv(
+    "COUNTRIES_API_URL",
+    "https://restcountries.com/v2/all?fields=name,capital,region,population,flag,currencies,alpha2Code,alpha3Code"
+)
+REFRESH_BATCH_SIZE = int(os.getenv("REFRESH_BATCH_SIZE", 100))
 
-    url = "https://restcountries.com/v2/all?fields=name,capital,region,population,flag,currencies"
-    response = requests.get(url)
+COUNTRY_COLUMNS = ("name", "capital", "region", "population", "flag", "currency_name", "currency_code",
+                   "alpha2_code", "alpha3_code", "exchange_rate", "estimated_gdp", "content_hash")
+
+
+def _insert_sql(table):
+    columns = ", ".join(COUNTRY_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(COUNTRY_COLUMNS))
+    return f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+
+
+def _upsert_sql():
+    updates = ", ".join(f"{c} = VALUES({c})" for c in COUNTRY_COLUMNS if c != "name")
+    return f"{_insert_sql('countries')} ON DUPLICATE KEY UPDATE {updates}, last_refreshed_at = CURRENT_TIMESTAMP"
+
+
+def _build_row(country):
+    name = country.get("name")
+    if not name:
+        raise ValueError("missing country name")
+    currency = country.get("currencies")[0] if country.get("currencies") else {}
+    return (
+        name,
+        country.get("capital"),
+        country.get("region"),
+        country.get("population"),
+        country.get("flag"),
+        currency.get("name"),
+        currency.get("code"),
+        country.get("alpha2Code"),
+        country.get("alpha3Code"),
+    )
 
-    if response.status_code == 200:
-        data = response.json()
-    else:
-        print("Failed to fetch data")
-        return False
 
-    cursor.execute("DELETE FROM countries")  # Clear old data
+def _enrich_rows(rows, rates):
+    """Append exchange_rate and estimated_gdp to every row in one pass over the batch."""
+    exchange_rates, estimated_gdps = compute_gdp(
+        [row[3] for row in rows],  # population
+        [row[6] for row in rows],  # currency_code
+        rates,
+    )
+    return [row + extra for row, extra in zip(rows, zip(exchange_rates, estimated_gdps))]
 
-    success = 0
-    fail = 0
 
+def _content_hash(row):
+    # Upstream fields plus exchange_rate; estimated_gdp (last) is derived, so it is left out
+    return hashlib.sha1(json.dumps(row[:-1], separators=(",", ":")).encode()).hexdigest()
+
+
+def _insert_rows(cursor, sql, rows, result):
+    """Insert rows in batches; a failing batch is retried row by row to isolate bad records."""
+    for start in range(0, len(rows), REFRESH_BATCH_SIZE):
+        batch = rows[start:start + REFRESH_BATCH_SIZE]
+        try:
+            cursor.executemany(sql, batch)  # rewritten into one multi-row INSERT
+            result["inserted"] += len(batch)
+        except mysql.connector.Error:
+            for row in batch:
+                try:
+                    cursor.execute(sql, row)
+                    result["inserted"] += 1
+                except mysql.connector.Error as e:
+                    result["failed"].append({"name": row[0], "error": str(e)})
+
+
+def _fetch_rows(result, offline=False):
+    """
+    Fetch countries and exchange rates and build hashed rows, or return None on
+    failure. offline=True reads only the local snapshots.
+    """
+    # Exchange rates are fetched alongside the country list
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        rates_future = executor.submit(get_exchange_rates, offline=offline)
+        started = time.perf_counter()
+        source = "failure"
+        try:
+            source, data = fetch_countries(COUNTRIES_API_URL, offline=offline)
+        except Exception as e:
+            result["error"] = str(e)
+            return None
+        finally:
+            metrics.UPSTREAM_FETCH.observe(time.perf_counter() - started, "countries", source)
+        try:
+            rates = rates_future.result()
+        except Exception as e:
+            result["error"] = f"Failed to fetch exchange rates: {e}"
+            return None
+
+    result["source"] = source
+    result["fetched"] = len(data)
+
+    rows = []
     for country in data:
         try:
-            name = country.get("name")
-            capital = country.get("capital")
-            region = country.get("region")
-            population = country.get("population")
-            flag = country.get("flag")
-            currency = country.get("currencies")[0] if country.get("currencies") else {}
-            currency_name = currency.get("name")
-            currency_code = currency.get("code")
-            estimated_gdp = None
-
-            cursor.execute("""
-                INSERT INTO countries (name, capital, region, population, flag, currency_name, currency_code, estimated_gdp)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (name, capital, region, population, flag, currency_name, currency_code, estimated_gdp))
-
-            success += 1
+            rows.append(_build_row(country))
         except Exception as e:
-            fail += 1
-            print(f"❌ Error inserting {country.get('name')}: {e}")
+            result["failed"].append({"name": country.get("name"), "error": str(e)})
+    return [row + (_content_hash(row),) for row in _enrich_rows(rows, rates)]
+
+
+def _new_result(progress):
+    result = progress if progress is not None else {}
+    result.update({"success": False, "fetched": 0, "inserted": 0, "failed": [], "duration": None})
+    return result
+
+
+def _acquire_refresh_lock(cursor):
+    cursor.execute("SELECT GET_LOCK('countries_refresh', 0)")
+    return cursor.fetchone()[0] == 1
+
+
+def _release_refresh_lock(cursor):
+    cursor.execute("SELECT RELEASE_LOCK('countries_refresh')")
+    cursor.fetchone()
+
+
+def _mark_refreshed(cursor):
+    cursor.execute("UPDATE dataset_meta SET last_refreshed_at = CURRENT_TIMESTAMP WHERE id = 1")
+
+
+def _bump_shared_version(cursor):
+    # Same transaction as the write, so other processes never see new data under the old version
+    cursor.execute("UPDATE dataset_meta SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1")
+
+
+def _stored_hashes(cursor):
+    cursor.execute("SELECT content_hash FROM countries")
+    return sorted(content_hash for (content_hash,) in cursor.fetchall())
+
+
+def _timed_refresh(mode, refresh, result):
+    """Run refresh(result), then stamp its duration and record refresh metrics."""
+    started = time.monotonic()
+    try:
+        refresh(result)
+    finally:
+        result["duration"] = round(time.monotonic() - started, 3)
+        metrics.record_refresh(mode, result)
+    return result
+
+
+def fetch_and_store_countries(progress=None):
+    """
+    Fetch all countries and swap them in atomically.
+
+    Rows are staged into countries_staging and then exchanged with the live
+    table through a single RENAME TABLE, so readers always see either the old
+    or the new data set and never an empty or partial table.
+
+    When upstream answers 304 and every row hashes the same as the stored one,
+    nothing is rewritten and the result has "skipped": True.
+
+    If a progress dict is passed it is used as the result and updated in
+    place, so a background job can report counters while the refresh runs.
+    """
+    return _timed_refresh("full", _full_refresh, _new_result(progress))
+
+
+def _full_refresh(result, offline=False):
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        # Only one refresh may run at a time, in any process; taken before
+        # fetching so a losing refresh does not download upstream for nothing
+        if not _acquire_refresh_lock(cursor):
+            result["error"] = "Another refresh is already running"
+            return result
+
+        try:
+            rows = _fetch_rows(result, offline)
+            if rows is None:
+                return result
+
+            if result["source"] == "not_modified" and _stored_hashes(cursor) == sorted(row[-1] for row in rows):
+                # Upstream answered 304 and the rates moved nothing: keep the table,
+                # its estimated GDPs and every cache as they are
+                _mark_refreshed(cursor)
+                conn.commit()
+                result["skipped"] = True
+                result["success"] = True
+                print("\n✅ Done! Upstream data and exchange rates unchanged; nothing to swap in.")
+                return result
+
+            cursor.execute("DROP TABLE IF EXISTS countries_staging")
+            cursor.execute("CREATE TABLE countries_staging LIKE countries")
+            _insert_rows(cursor, _insert_sql("countries_staging"), rows, result)
+            conn.commit()
+
+            cursor.execute("DROP TABLE IF EXISTS countries_old")
+            cursor.execute("RENAME TABLE countries TO countries_old, countries_staging TO countries")
+            cursor.execute("DROP TABLE countries_old")
+            _mark_refreshed(cursor)
+            _bump_shared_version(cursor)
+            conn.commit()
+        finally:
+            _release_refresh_lock(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+    bump_dataset_version()
+    result["success"] = True
+    print(f"\n✅ Done! Inserted {result['inserted']} countries. Failed: {len(result['failed'])}.")
+    return result
+
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+def seed_from_snapshot():
+    """
+    Cold start: fill an empty countries table from the local snapshots
+    without touching the network. Returns the refresh result, or None if
+    there was nothing to do.
+    """
+    if not has_snapshot("countries") or get_status()["total_countries"] > 0:
+        return None
+    return _timed_refresh("snapshot", lambda result: _full_refresh(result, offline=True), _new_result(None))
 
-    print(f"\n✅ Done! Inserted {success} countries. Failed: {fail}.")
-    return True
+
+def refresh_countries_incremental(progress=None):
+    """
+    Write only what changed upstream.
+
+    Each row carries a content hash of its upstream record; rows whose hash
+    matches the stored one are skipped, changed or new rows are upserted and
+    countries that disappeared upstream are deleted, all in one transaction.
+    """
+    result = _new_result(progress)
+    result.update({"unchanged": 0, "deleted": 0})
+    return _timed_refresh("incremental", _incremental_refresh, result)
+
+
+def _incremental_refresh(result):
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if not _acquire_refresh_lock(cursor):
+            result["error"] = "Another refresh is already running"
+            return result
+
+        try:
+            rows = _fetch_rows(result)
+            if rows is None:
+                return result
+
+            cursor.execute("SELECT name, content_hash FROM countries")
+            # Key names like the utf8mb4_unicode_ci unique index compares them (case and accents
+            # ignored), so an upsert that only changes accents is not also deleted below
+            stored = {normalize_name(name): (name, content_hash) for name, content_hash in cursor.fetchall()}
+
+            changed = []
+            for row in rows:
+                _, stored_hash = stored.pop(normalize_name(row[0]), (None, None))
+                if stored_hash == row[-1]:
+                    result["unchanged"] += 1
+                else:
+                    changed.append(row)
+            removed = [name for name, _ in stored.values()]
+
+            _insert_rows(cursor, _upsert_sql(), changed, result)
+            for start in range(0, len(removed), REFRESH_BATCH_SIZE):
+                batch = removed[start:start + REFRESH_BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(f"DELETE FROM countries WHERE name IN ({placeholders})", batch)
+                result["deleted"] += cursor.rowcount
+            _mark_refreshed(cursor)
+            if result["inserted"] or result["deleted"]:
+                _bump_shared_version(cursor)
+            conn.commit()
+        finally:
+            _release_refresh_lock(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+    if result["inserted"] or result["deleted"]:
+        bump_dataset_version()
+    result["success"] = True
+    print(f"\n✅ Done! Upserted {result['inserted']}, deleted {result['deleted']}, "
+          f"unchanged {result['unchanged']}. Failed: {len(result['failed'])}.")
+    return result
 
 
 # -----------------------------
 # Utility Functions for API
 # -----------------------------
-def get_countries(region=None, currency=None, sort=None):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+COUNTRY_FIELDS = ("id", "name", "capital", "region", "population", "flag", "currency_name", "currency_code",
+                  "alpha2_code", "alpha3_code", "exchange_rate", "estimated_gdp", "last_refreshed_at")
+
+# sort option -> (column, direction); id breaks ties so keyset pages are stable
+SORT_SPECS = {
+    "gdp_asc": ("estimated_gdp", "ASC"),
+    "gdp_desc": ("estimated_gdp", "DESC"),
+    "name_asc": ("name", "ASC"),
+    "name_desc": ("name", "DESC"),
+    "population_asc": ("population", "ASC"),
+    "population_desc": ("population", "DESC"),
+}
+SORT_OPTIONS = tuple(SORT_SPECS)
+
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", 250))
+
 
-    query = "SELECT * FROM countries WHERE 1=1"
+def normalize_query(region, currency, sort):
+    # Filters compare case-insensitively in MySQL, so the cache key does too. Callers
+    # query with these values as well: the cache key must describe the query that ran
+    region = region.strip().casefold() if region else None
+    currency = currency.strip().casefold() if currency else None
+    sort = sort if sort in SORT_OPTIONS else None
+    return (region, currency, sort)
+
+
+def parse_fields(fields):
+    """Turn "name,population" (or a list) into a validated tuple; None means all columns."""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    cleaned = tuple(dict.fromkeys(f.strip() for f in fields if f.strip()))
+    unknown = [f for f in cleaned if f not in COUNTRY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return cleaned or None
+
+
+def encode_cursor(sort, row):
+    column, _ = SORT_SPECS.get(sort, ("id", "ASC"))
+    token = json.dumps({"s": sort, "v": row[column], "id": row["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort, cursor):
+    """Return the (value, id) position a cursor points after."""
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, last_id = token["v"], int(token["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if token.get("s") != sort:
+        raise ValueError("Cursor was issued for a different sort")
+    # The value is compared against the sort column (in memory too), so it must have its type
+    column, _ = SORT_SPECS.get(sort, ("id", "ASC"))
+    if column == "name":
+        valid = isinstance(value, str)
+    else:
+        valid = value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+    if not valid:
+        raise ValueError("Invalid cursor")
+    return value, last_id
+
+
+def get_countries(region=None, currency=None, sort=None, fields=None):
+    """Read-through cached query; the returned list is shared and must not be mutated."""
+    fields = parse_fields(fields)
+    region, currency, sort = normalize_query(region, currency, sort)
+    key = (region, currency, sort, fields)
+    version = get_dataset_version()  # read before querying so a racing write is never cached as current
+    hit, results = query_cache.get(key, version)
+    if hit:
+        return results
+    results = _query_countries(region, currency, sort, fields)
+    query_cache.set(key, results, version)
+    return results
+
+
+def get_countries_page(region=None, currency=None, sort=None, fields=None, limit=50, cursor=None):
+    """
+    One keyset page: {"data": [...], "next_cursor": str | None, "limit": int}.
+
+    Pages continue from the (sort value, id) of the previous page's last row,
+    so cost depends on the page size rather than on how deep the client is.
+    """
+    fields = parse_fields(fields)
+    region, currency, sort = normalize_query(region, currency, sort)
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    limit = min(limit, PAGE_MAX_LIMIT)
+    after = decode_cursor(sort, cursor) if cursor else None
+
+    key = (region, currency, sort, fields, limit, cursor)
+    version = get_dataset_version()
+    hit, page = query_cache.get(key, version)
+    if hit:
+        return page
+
+    sort_column, _ = SORT_SPECS.get(sort, ("id", "ASC"))
+    columns = fields
+    if fields:
+        # The cursor needs id and the sort column even when the client did not ask for them
+        columns = tuple(dict.fromkeys(fields + ("id", sort_column)))
+    rows = _query_countries(region, currency, sort, columns, limit + 1, after)
+
+    next_cursor = encode_cursor(sort, rows[limit - 1]) if len(rows) > limit else None
+    rows = rows[:limit]
+    if fields and columns != fields:
+        rows = [{f: row[f] for f in fields} for row in rows]
+
+    page = {"data": rows, "next_cursor": next_cursor, "limit": limit}
+    query_cache.set(key, page, version)
+    return page
+
+
+def _keyset_condition(column, direction, after):
+    """WHERE fragment selecting rows after (value, id); MySQL sorts NULLs first ascending."""
+    value, last_id = after
+    if column == "id":
+        return ("id > %s" if direction == "ASC" else "id < %s"), [last_id]
+    if direction == "ASC":
+        if value is None:
+            return f"(({column} IS NULL AND id > %s) OR {column} IS NOT NULL)", [last_id]
+        return f"({column} > %s OR ({column} = %s AND id > %s))", [value, value, last_id]
+    if value is None:
+        return f"({column} IS NULL AND id < %s)", [last_id]
+    return f"({column} < %s OR ({column} = %s AND id < %s) OR {column} IS NULL)", [value, value, last_id]
+
+
+def _select_sql(region=None, currency=None, sort=None, columns=None, limit=None, after=None):
+    select = ", ".join(columns or COUNTRY_FIELDS)
+    query = f"SELECT {select} FROM countries WHERE 1=1"
     params = []
 
     if region:
@@ -65,44 +447,266 @@ def get_countries(region=None, currency=None, sort=None):
     if currency:
         query += " AND currency_code = %s"
         params.append(currency)
-    if sort == "gdp_asc":
-        query += " ORDER BY estimated_gdp ASC"
-    elif sort == "gdp_desc":
-        query += " ORDER BY estimated_gdp DESC"
-
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
+
+    sort_column, direction = SORT_SPECS.get(sort, ("id", "ASC"))
+    if after is not None:
+        condition, condition_params = _keyset_condition(sort_column, direction, after)
+        query += f" AND {condition}"
+        params.extend(condition_params)
+    if sort_column == "id":
+        query += f" ORDER BY id {direction}"
+    else:
+        query += f" ORDER BY {sort_column} {direction}, id {direction}"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+def _query_countries(region=None, currency=None, sort=None, columns=None, limit=None, after=None):
+    if QUERY_ENGINE == "memory":
+        sort_column, direction = SORT_SPECS.get(sort, ("id", "ASC"))
+        return get_dataset_snapshot().table.query(region, currency, sort_column, direction, columns, limit, after)
+    return _query_db(region, currency, sort, columns, limit, after)
+
+
+def _query_db(region=None, currency=None, sort=None, columns=None, limit=None, after=None):
+    with get_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(*_select_sql(region, currency, sort, columns, limit, after))
+        results = cursor.fetchall()
+        cursor.close()
     return results
 
 
-def get_country_by_name(name):
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 100))
+
+
+def iter_countries(region=None, currency=None, sort=None, fields=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield rows straight off an unbuffered cursor, chunk_size at a time.
+
+    Rows are read from the server as they are consumed instead of being
+    materialized with fetchall(), so memory stays flat for any table size.
+    The connection is held until the generator is exhausted or closed.
+    """
+    fields = parse_fields(fields)
     conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM countries WHERE name = %s", (name,))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return result
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    exhausted = False
+    try:
+        cursor.execute(*_select_sql(region, currency, sort, fields))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                exhausted = True
+                break
+            yield from rows
+    finally:
+        if not exhausted:
+            # Client went away mid-stream: drain the unread result before reusing the connection
+            try:
+                conn.consume_results()
+            except Exception:
+                pass
+        cursor.close()
+        conn.close()
 
 
-def delete_country_by_name(name):
+# group name -> column
+STATS_GROUPS = {"region": "region", "currency": "currency_code"}
+
+
+def get_country_stats(group_by):
+    """Per-region or per-currency counts and sums, from one GROUP BY and cached per dataset version."""
+    column = STATS_GROUPS[group_by]
+    key = ("stats", group_by)
+    version = get_dataset_version()
+    hit, results = query_cache.get(key, version)
+    if hit:
+        return results
+
+    with get_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT {column} AS {group_by},
+                   COUNT(*) AS countries,
+                   CAST(COALESCE(SUM(population), 0) AS SIGNED) AS total_population,
+                   SUM(estimated_gdp) AS total_estimated_gdp
+            FROM countries
+            GROUP BY {column}
+            ORDER BY {column}
+        """)
+        results = cursor.fetchall()
+        cursor.close()
+    query_cache.set(key, results, version)
+    return results
+
+
+_dataset = (None, None)  # (dataset version, DatasetSnapshot), replaced as one object
+_dataset_lock = threading.Lock()
+
+
+def get_dataset_snapshot():
+    """
+    Read-only snapshot of the full dataset, reloaded only when the dataset
+    version changes. With QUERY_ENGINE=memory it also carries the
+    ColumnarTable that answers /countries queries.
+    """
+    global _dataset
+    version = get_dataset_version()
+    loaded_version, snapshot = _dataset
+    if loaded_version == version and snapshot is not None:
+        return snapshot
+    with _dataset_lock:
+        loaded_version, snapshot = _dataset
+        if loaded_version != version or snapshot is None:
+            rows = _query_db()
+            table = ColumnarTable(rows, COUNTRY_FIELDS) if QUERY_ENGINE == "memory" else None
+            snapshot = DatasetSnapshot(rows, table)
+            _dataset = (version, snapshot)
+    return snapshot
+
+
+def get_name_index():
+    return get_dataset_snapshot().name_index
+
+
+def get_shared_version():
+    """Dataset version shared by all processes, bumped by every write."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT version FROM dataset_meta WHERE id = 1")
+        row = cursor.fetchone()
+        cursor.close()
+    return row[0] if row else 0
+
+
+def get_last_modified():
+    """UTC datetime of the last change to the data (for Last-Modified), cached per dataset version."""
+    key = ("last_modified",)
+    version = get_dataset_version()
+    hit, last_modified = query_cache.get(key, version)
+    if hit:
+        return last_modified
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        # UNIX_TIMESTAMP interprets the DATETIME in the session time zone, whatever the server's is
+        cursor.execute("SELECT UNIX_TIMESTAMP(COALESCE(updated_at, last_refreshed_at)) FROM dataset_meta WHERE id = 1")
+        row = cursor.fetchone()
+        cursor.close()
+    last_modified = None
+    if row and row[0] is not None:
+        last_modified = datetime.datetime.fromtimestamp(int(row[0]), datetime.timezone.utc)
+    query_cache.set(key, last_modified, version)
+    return last_modified
+
+
+def refresh_in_progress():
+    """True while any process holds the refresh lock (checked without taking it)."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT IS_USED_LOCK('countries_refresh') IS NOT NULL")
+        in_use = cursor.fetchone()[0]
+        cursor.close()
+    return bool(in_use)
+
+
+def refreshed_within(seconds):
+    """True if any process refreshed the dataset in the last seconds."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT last_refreshed_at >= NOW() - INTERVAL %s SECOND FROM dataset_meta WHERE id = 1",
+                       (seconds,))
+        row = cursor.fetchone()
+        cursor.close()
+    return bool(row and row[0])
+
+
+def get_country_by_name(name):
+    """Look a country up by name in any case/accent variant, ISO code or common alias."""
+    return get_name_index().lookup(name)
+
+
+BATCH_MAX_NAMES = int(os.getenv("BATCH_MAX_NAMES", 100))
+
+
+def _check_batch(names):
+    if not isinstance(names, list) or not all(isinstance(n, str) and n.strip() for n in names):
+        raise ValueError("names must be a list of non-empty strings")
+    if not names:
+        raise ValueError("names must not be empty")
+    if len(names) > BATCH_MAX_NAMES:
+        raise ValueError(f"At most {BATCH_MAX_NAMES} names per batch")
+
+
+def get_countries_by_names(names):
+    """
+    Resolve many names, ISO codes or aliases at once: [(name, country or None)].
+
+    Lookups go through the same in-memory name index as get_country_by_name,
+    so the whole batch costs at most the one query that loads the index.
+    """
+    _check_batch(names)
+    index = get_name_index()
+    return [(name, index.lookup(name)) for name in names]
+
+
+def delete_countries_by_names(names):
+    """
+    Delete many countries in one transaction: [(name, deleted)].
+
+    Names match like the single delete (exactly, up to case and accents).
+    """
+    _check_batch(names)
+    # Exact duplicates only: normalize_name() folds spellings that MySQL keeps apart
+    unique = list(dict.fromkeys(names))
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM countries WHERE name = %s", (name,))
-    conn.commit()
-    deleted = cursor.rowcount > 0
-    cursor.close()
-    conn.close()
+    try:
+        placeholders = ", ".join(["%s"] * len(unique))
+        cursor.execute(f"SELECT name FROM countries WHERE name IN ({placeholders}) FOR UPDATE", unique)
+        existing = {normalize_name(name) for (name,) in cursor.fetchall()}
+        if existing:
+            cursor.execute(f"DELETE FROM countries WHERE name IN ({placeholders})", unique)
+            _bump_shared_version(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    if existing:
+        bump_dataset_version()
+    return [(name, normalize_name(name) in existing) for name in names]
+
+
+def delete_country_by_name(name):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM countries WHERE name = %s", (name,))
+        deleted = cursor.rowcount > 0
+        if deleted:
+            _bump_shared_version(cursor)
+        conn.commit()
+        cursor.close()
+    if deleted:
+        bump_dataset_version()
     return deleted
 
 
 def get_status():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM countries")
-    total = cursor.fetchone()[0]
-    cursor.close()
-    conn.close()
-    return {"total_countries": total, "status": "active"}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM countries")
+        total = cursor.fetchone()[0]
+        cursor.execute("SELECT last_refreshed_at FROM dataset_meta WHERE id = 1")
+        meta = cursor.fetchone()
+        last_refreshed_at = meta[0] if meta else None
+        cursor.close()
+    return {
+        "total_countries": total,
+        "last_refreshed_at": last_refreshed_at.isoformat() if last_refreshed_at else None,
+        "status": "active",
+        "db_pool": get_pool_stats(),
+        "query_cache": {**query_cache.stats(), "dataset_version": get_dataset_version()},
+    }
@@ -1,21 +1,35 @@
+import hashlib
+import io
 import os
-from PIL import Image, ImageDraw, ImageFont
-from src.app import get_countries, get_status
+import tempfile
+import threading
+from src.cache import get_dataset_version
+from src.fetch_countries import get_countries_page, get_status
+from src.upstream import SNAPSHOT_DIR
+
+IMAGE_DIR = SNAPSHOT_DIR
+IMAGE_PATH = os.path.join(IMAGE_DIR, "summary.png")
+IMAGE_MAX_AGE = int(os.getenv("IMAGE_MAX_AGE", 300))  # Cache-Control max-age in seconds
+
+# Latest rendered image, served straight from memory
+_image = {"version": None, "png": None, "etag": None}
+_image_lock = threading.Lock()
+_render_requested = threading.Event()
+_worker = None
 
-def generate_summary_image():
-    if not os.path.exists("cache"):
-        os.makedirs("cache")
+
+def render_summary_png():
+    from PIL import Image, ImageDraw, ImageFont
 
     # Get data
     status = get_status()
     total_countries = status["total_countries"]
     last_refreshed = status["last_refreshed_at"]
-    top_countries = get_countries(sort="gdp_desc")[:5]
+    top_countries = get_countries_page(sort="gdp_desc", fields="name,estimated_gdp", limit=5)["data"]
 
     # Create image
     img = Image.new("RGB", (600, 400), color=(255, 255, 255))
     d = ImageDraw.Draw(img)
-    font_path = "arial.ttf"  # Make sure you have this font or use default
     font = ImageFont.load_default()
 
     d.text((20, 20), f"Total Countries: {total_countries}", fill=(0, 0, 0), font=font)
@@ -24,7 +38,84 @@ def generate_summary_image():
 
     y = 110
     for country in top_countries:
-        d.text((40, y), f"{country['name']}: {country['estimated_gdp']:.2f}", fill=(0, 0, 0), font=font)
+        gdp = country["estimated_gdp"]
+        d.text((40, y), f"{country['name']}: {gdp:.2f}" if gdp is not None else f"{country['name']}: n/a",
+               fill=(0, 0, 0), font=font)
         y += 30
 
-    img.save("cache/summary.png")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _write_atomically(png):
+    # Readers of summary.png see either the old or the new file, never a partial one
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=IMAGE_DIR, suffix=".png.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, IMAGE_PATH)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def _store(version, png):
+    # Content only, so every worker process hands out the same ETag for the same image
+    etag = f"img-{hashlib.sha1(png).hexdigest()[:20]}"
+    with _image_lock:
+        _image.update(version=version, png=png, etag=etag)
+
+
+def generate_summary_image():
+    """Render the summary for the current dataset version, write it to disk and keep it in memory."""
+    version = get_dataset_version()
+    png = render_summary_png()
+    _write_atomically(png)
+    _store(version, png)
+    return png
+
+
+def _render_loop():
+    while True:
+        _render_requested.wait()
+        _render_requested.clear()
+        if _image["version"] == get_dataset_version():
+            continue
+        try:
+            generate_summary_image()
+        except Exception as e:
+            print(f"❌ Error rendering summary image: {e}")
+
+
+def request_render():
+    """Ask the background worker to re-render; several requests collapse into one render."""
+    global _worker
+    with _image_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_render_loop, name="image-renderer", daemon=True)
+            _worker.start()
+    _render_requested.set()
+
+
+def get_summary_image():
+    """
+    Return (png_bytes, etag) or (None, None) if nothing has been rendered yet.
+
+    A stale image (older dataset version) is still returned while a fresh one
+    renders in the background.
+    """
+    with _image_lock:
+        png, etag, version = _image["png"], _image["etag"], _image["version"]
+
+    if png is None and os.path.exists(IMAGE_PATH):
+        # Cold start: serve the last image on disk until the worker renders a current one
+        with open(IMAGE_PATH, "rb") as f:
+            png = f.read()
+        _store(None, png)
+        png, etag = _image["png"], _image["etag"]
+
+    if version != get_dataset_version():
+        request_render()
+    return png, etag
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from mysql.connector import errors
+from src.db_connection import get_connection
+
+JOB_HISTORY = 50  # finished jobs kept for GET /refresh/<job_id>
+JOB_HEARTBEAT = float(os.getenv("JOB_HEARTBEAT", 1))  # seconds between progress saves of a running job
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", 60))  # active job without a save this long is treated as lost
+
+
+class JobStore:
+    """
+    Job snapshots in the refresh_jobs table, so every worker process sees
+    the same jobs and concurrent submits merge into one.
+    """
+
+    def __init__(self, history=JOB_HISTORY, stale_after=JOB_STALE_AFTER):
+        self.history = history
+        self.stale_after = stale_after
+
+    def claim(self, snapshot):
+        """
+        Record snapshot as the one active job. Returns None if it was
+        recorded, or the snapshot of the job that is already active.
+        """
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for _ in range(3):
+                    try:
+                        cursor.execute("INSERT INTO refresh_jobs (id, active, state, updated_at) "
+                                       "VALUES (%s, 1, %s, NOW(3))", (snapshot["job_id"], json.dumps(snapshot)))
+                        conn.commit()
+                        return None
+                    except errors.IntegrityError:
+                        conn.rollback()
+
+                    cursor.execute("SELECT id, state, updated_at < NOW(3) - INTERVAL %s SECOND "
+                                   "FROM refresh_jobs WHERE active = 1", (self.stale_after,))
+                    row = cursor.fetchone()
+                    if row is None:
+                        continue  # finished in the meantime: try again
+                    job_id, state, stale = row
+                    if not stale:
+                        return json.loads(state)
+                    # The process running it died: fail it and free the slot
+                    lost = {**json.loads(state), "status": "failed", "finished_at": time.time(),
+                            "error": "The worker running this job stopped responding"}
+                    cursor.execute("UPDATE refresh_jobs SET active = NULL, state = %s, updated_at = NOW(3) "
+                                   "WHERE id = %s AND active = 1", (json.dumps(lost), job_id))
+                    conn.commit()
+            finally:
+                cursor.close()
+        raise RuntimeError("Could not record the refresh job")
+
+    def save(self, snapshot, active=True):
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            if active:
+                # No-op once another process has given the job up as lost
+                cursor.execute("UPDATE refresh_jobs SET state = %s, updated_at = NOW(3) WHERE id = %s AND active = 1",
+                               (json.dumps(snapshot), snapshot["job_id"]))
+            else:
+                cursor.execute("UPDATE refresh_jobs SET active = NULL, state = %s, updated_at = NOW(3) WHERE id = %s",
+                               (json.dumps(snapshot), snapshot["job_id"]))
+                # Keep only the latest finished jobs
+                cursor.execute("""
+                    DELETE FROM refresh_jobs WHERE active IS NULL AND id NOT IN (
+                        SELECT id FROM (SELECT id FROM refresh_jobs ORDER BY updated_at DESC LIMIT %s) AS recent
+                    )
+                """, (self.history,))
+            conn.commit()
+            cursor.close()
+
+    def get(self, job_id):
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT state FROM refresh_jobs WHERE id = %s", (job_id,))
+            row = cursor.fetchone()
+            cursor.close()
+        return json.loads(row[0]) if row else None
+
+    def has_active(self):
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM refresh_jobs WHERE active = 1 "
+                           "AND updated_at >= NOW(3) - INTERVAL %s SECOND", (self.stale_after,))
+            count = cursor.fetchone()[0]
+            cursor.close()
+        return count > 0
+
+
+class RefreshJobQueue:
+    """
+    Runs refreshes on one background worker thread, one at a time.
+
+    submit() while a job is queued or running returns that job instead of
+    starting another, so concurrent POST /refresh calls share one refresh.
+    With a JobStore this holds across worker processes too: the active job
+    lives in the database, and job status can be read from any process.
+    """
+
+    def __init__(self, history=JOB_HISTORY, store=None):
+        self.history = history
+        self.store = store
+        self._jobs = OrderedDict()  # job_id -> job dict, oldest first
+        self._pending = None
+        self._active = None
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def submit(self, task, mode="full"):
+        """Queue task(progress) and return (job, created)."""
+        with self._cond:
+            current = self._active or self._pending
+            if current is not None:
+                return self._snapshot(current), False
+
+            job = {
+                "id": uuid.uuid4().hex,
+                "mode": mode,
+                "status": "queued",
+                "error": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "progress": {"fetched": 0, "inserted": 0, "failed": [], "duration": None},
+                "_task": task,
+            }
+            if self.store is not None:
+                try:
+                    existing = self.store.claim(self._snapshot(job))
+                except Exception as e:
+                    print(f"⚠️ Could not record the refresh job, running it locally only: {e}")
+                    existing = None
+                if existing is not None:
+                    return existing, False
+
+            self._jobs[job["id"]] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            self._pending = job
+            self._ensure_worker()
+            self._cond.notify()
+            return self._snapshot(job), True
+
+    def get(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job:
+                return self._snapshot(job)
+        if self.store is not None:
+            return self.store.get(job_id)
+        return None
+
+    def has_active(self):
+        """True if a job is queued or running in this or (with a store) any process."""
+        with self._cond:
+            if self._active or self._pending:
+                return True
+        return self.store is not None and self.store.has_active()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="refresh-worker", daemon=True)
+            self._worker.start()
+
+    def _save(self, job, active=True):
+        if self.store is None:
+            return
+        with self._cond:
+            snapshot = self._snapshot(job)
+        try:
+            self.store.save(snapshot, active)
+        except Exception as e:
+            print(f"⚠️ Could not save refresh job {job['id']}: {e}")
+
+    def _heartbeat(self, job, done):
+        # Publishes progress and shows other processes the job is still alive
+        while not done.wait(JOB_HEARTBEAT):
+            self._save(job)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                job, self._pending = self._pending, None
+                self._active = job
+                job["status"] = "running"
+                job["started_at"] = time.time()
+
+            done, heartbeat = threading.Event(), None
+            if self.store is not None:
+                self._save(job)
+                heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), name="refresh-heartbeat",
+                                             daemon=True)
+                heartbeat.start()
+            try:
+                result = job["_task"](job["progress"])
+                status = "succeeded" if result.get("success") else "failed"
+                error = result.get("error")
+            except Exception as e:
+                status, error = "failed", str(e)
+            finally:
+                done.set()
+                if heartbeat is not None:
+                    heartbeat.join()  # so a late progress save cannot follow the final one
+
+            with self._cond:
+                job["status"] = status
+                job["error"] = error
+                job["finished_at"] = time.time()
+                self._active = None
+            self._save(job, active=False)
+
+    def _snapshot(self, job):
+        progress = job["progress"]
+        duration = progress.get("duration")
+        if duration is None and job["started_at"]:
+            duration = round((job["finished_at"] or time.time()) - job["started_at"], 3)
+        return {
+            "job_id": job["id"],
+            "mode": job["mode"],
+            "status": job["status"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "progress": {
+                "fetched": progress.get("fetched", 0),
+                "inserted": progress.get("inserted", 0),
+                "failed": len(progress.get("failed", [])),
+                "duration": duration,
+            },
+            "failures": list(progress.get("failed", [])),
+        }
+
+
+refresh_queue = RefreshJobQueue(store=JobStore())
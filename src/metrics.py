@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+import time
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 0))  # log requests slower than this, 0 = off
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+logger = logging.getLogger("countries_api.slow_requests")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# -----------------------------
+# Metric Types
+# -----------------------------
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read at scrape time; fn returns a number or a {label_values_tuple: number}
+    dict. kind="counter" exposes totals that are tracked elsewhere (e.g. pool stats).
+    """
+
+    def __init__(self, name, help, fn, labels=(), kind="gauge"):
+        self.name, self.help, self.fn, self.labels, self.kind = name, help, fn, tuple(labels), kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            values = self.fn()
+        except Exception:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        for label_values, value in sorted(values.items()):
+            if value is not None:
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+_registry = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def register_gauge(name, help, fn, labels=(), kind="gauge"):
+    return _register(Gauge(name, help, fn, labels, kind))
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+REQUEST_LATENCY = _register(Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route", "status")))
+REQUEST_DB_TIME = _register(Histogram(
+    "http_request_db_seconds", "Time spent in DB queries per request", ("route",)))
+REQUEST_QUERIES = _register(Histogram(
+    "http_request_db_queries", "DB queries issued per request", ("route",), COUNT_BUCKETS))
+DB_QUERY_LATENCY = _register(Histogram(
+    "db_query_duration_seconds", "Latency of individual DB statements", ("operation",)))
+DB_ACQUIRE_LATENCY = _register(Histogram(
+    "db_connection_acquire_seconds", "Time to check a connection out of the pool"))
+REFRESH_DURATION = _register(Histogram(
+    "refresh_duration_seconds", "Refresh duration", ("mode", "outcome"), LATENCY_BUCKETS + (30.0, 60.0)))
+REFRESH_ROWS = _register(Counter(
+    "refresh_rows_written_total", "Rows inserted or updated by refreshes", ("mode",)))
+REFRESH_FAILED_ROWS = _register(Counter(
+    "refresh_rows_failed_total", "Rows that failed to build or insert during refreshes", ("mode",)))
+UPSTREAM_FETCH = _register(Histogram(
+    "upstream_fetch_duration_seconds", "Time to fetch from upstream APIs", ("source", "outcome")))
+
+
+# -----------------------------
+# Per-request DB accounting
+# -----------------------------
+_request = threading.local()
+
+
+def record_query(operation, seconds):
+    DB_QUERY_LATENCY.observe(seconds, operation)
+    if getattr(_request, "active", False):
+        _request.db_time += seconds
+        _request.queries += 1
+
+
+def record_refresh(mode, result):
+    outcome = "success" if result.get("success") else "failure"
+    if result.get("duration") is not None:
+        REFRESH_DURATION.observe(result["duration"], mode, outcome)
+    REFRESH_ROWS.inc(result.get("inserted", 0), mode)
+    REFRESH_FAILED_ROWS.inc(len(result.get("failed", [])), mode)
+
+
+def install_request_metrics(app):
+    """Time every request and log the slow ones (SLOW_REQUEST_MS)."""
+    from flask import request
+
+    @app.before_request
+    def _start_timer():
+        _request.active = True
+        _request.started = time.perf_counter()
+        _request.db_time = 0.0
+        _request.queries = 0
+
+    @app.after_request
+    def _record(response):
+        if not getattr(_request, "active", False):
+            return response
+        elapsed = time.perf_counter() - _request.started
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.observe(elapsed, request.method, route, str(response.status_code))
+        REQUEST_DB_TIME.observe(_request.db_time, route)
+        REQUEST_QUERIES.observe(_request.queries, route)
+        if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+            logger.warning("Slow request %s %s -> %s in %.1fms (db %.1fms, %d queries)",
+                           request.method, request.full_path.rstrip("?"), response.status_code,
+                           elapsed * 1000, _request.db_time * 1000, _request.queries)
+        _request.active = False
+        return response
@@ -0,0 +1,232 @@
+import time
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def _column_type(cursor, table, column):
+    cursor.execute("""
+        SELECT DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+
+def _index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+# -----------------------------
+# Migrations
+# -----------------------------
+# MySQL commits DDL implicitly, so every step checks what already exists and
+# can be re-run safely if a previous attempt stopped halfway.
+def _create_countries(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS countries (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+            capital VARCHAR(100),
+            region VARCHAR(100),
+            population BIGINT,
+            flag VARCHAR(255),
+            currency_name VARCHAR(100),
+            currency_code VARCHAR(10),
+            exchange_rate DOUBLE NULL,
+            estimated_gdp DOUBLE NULL,
+            last_refreshed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        ) DEFAULT CHARSET = utf8mb4 COLLATE = utf8mb4_unicode_ci
+    """)
+
+
+def _upgrade_legacy_columns(cursor):
+    # Tables created by the first initialize_db() only had id, name and currency
+    if _column_exists(cursor, "countries", "currency"):
+        cursor.execute("ALTER TABLE countries DROP COLUMN currency")
+    cursor.execute("""
+        ALTER TABLE countries MODIFY name
+        VARCHAR(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL
+    """)
+    columns = [
+        ("capital", "VARCHAR(100)"),
+        ("region", "VARCHAR(100)"),
+        ("population", "BIGINT"),
+        ("flag", "VARCHAR(255)"),
+        ("currency_name", "VARCHAR(100)"),
+        ("currency_code", "VARCHAR(10)"),
+        ("exchange_rate", "DOUBLE NULL"),
+        ("estimated_gdp", "DOUBLE NULL"),
+        ("last_refreshed_at", "DATETIME DEFAULT CURRENT_TIMESTAMP"),
+    ]
+    for column, definition in columns:
+        if not _column_exists(cursor, "countries", column):
+            cursor.execute(f"ALTER TABLE countries ADD COLUMN {column} {definition}")
+    _fix_numeric_column_types(cursor)
+
+
+def _fix_numeric_column_types(cursor):
+    # Hand-made tables may hold these as FLOAT/INT, which rounds GDPs and rates
+    for column, data_type, definition in (("population", "bigint", "BIGINT"),
+                                          ("exchange_rate", "double", "DOUBLE NULL"),
+                                          ("estimated_gdp", "double", "DOUBLE NULL")):
+        current = _column_type(cursor, "countries", column)
+        if current is not None and current != data_type:
+            cursor.execute(f"ALTER TABLE countries MODIFY {column} {definition}")
+
+
+def _drop_legacy_name_index(cursor):
+    # The first schema declared name UNIQUE inline, which MySQL names "name";
+    # uq_countries_name replaces it
+    if _index_exists(cursor, "countries", "name"):
+        cursor.execute("ALTER TABLE countries DROP INDEX name")
+
+
+def _add_country_indexes(cursor):
+    # The unique index needs duplicate names gone first (keep the oldest row)
+    if not _index_exists(cursor, "countries", "uq_countries_name"):
+        cursor.execute("""
+            DELETE c1 FROM countries c1
+            JOIN countries c2 ON c1.name = c2.name AND c1.id > c2.id
+        """)
+    indexes = [
+        ("uq_countries_name", "UNIQUE INDEX uq_countries_name (name)"),
+        ("idx_countries_region_currency_gdp", "INDEX idx_countries_region_currency_gdp (region, currency_code, estimated_gdp)"),
+        ("idx_countries_currency_gdp", "INDEX idx_countries_currency_gdp (currency_code, estimated_gdp)"),
+        ("idx_countries_gdp", "INDEX idx_countries_gdp (estimated_gdp)"),
+    ]
+    for name, definition in indexes:
+        if not _index_exists(cursor, "countries", name):
+            cursor.execute(f"ALTER TABLE countries ADD {definition}")
+    _drop_legacy_name_index(cursor)
+
+
+def _add_refresh_tracking(cursor):
+    if not _column_exists(cursor, "countries", "content_hash"):
+        cursor.execute("ALTER TABLE countries ADD COLUMN content_hash CHAR(40) NULL")
+    # Dataset-wide bookkeeping; a single row with id = 1
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dataset_meta (
+            id TINYINT PRIMARY KEY,
+            last_refreshed_at DATETIME NULL
+        )
+    """)
+    cursor.execute("INSERT IGNORE INTO dataset_meta (id, last_refreshed_at) "
+                   "SELECT 1, MAX(last_refreshed_at) FROM countries")
+
+
+def _add_iso_codes(cursor):
+    for column, definition in (("alpha2_code", "CHAR(2) NULL"), ("alpha3_code", "CHAR(3) NULL")):
+        if not _column_exists(cursor, "countries", column):
+            cursor.execute(f"ALTER TABLE countries ADD COLUMN {column} {definition}")
+
+
+def _add_dataset_version(cursor):
+    # Bumped with every write so other worker processes can tell their snapshot is stale
+    if not _column_exists(cursor, "dataset_meta", "version"):
+        cursor.execute("ALTER TABLE dataset_meta ADD COLUMN version BIGINT NOT NULL DEFAULT 0")
+
+
+def _add_dataset_updated_at(cursor):
+    # Set with every version bump; last_refreshed_at alone misses deletes and no-op refreshes move it
+    if not _column_exists(cursor, "dataset_meta", "updated_at"):
+        cursor.execute("ALTER TABLE dataset_meta ADD COLUMN updated_at DATETIME NULL")
+        cursor.execute("UPDATE dataset_meta SET updated_at = last_refreshed_at")
+
+
+def _create_refresh_jobs(cursor):
+    # Refresh job state shared by all worker processes. active is 1 while a
+    # job is queued or running and NULL afterwards; the unique index lets at
+    # most one job be active, which is how concurrent submits merge.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS refresh_jobs (
+            id CHAR(32) PRIMARY KEY,
+            active TINYINT NULL,
+            state MEDIUMTEXT NOT NULL,
+            updated_at DATETIME(3) NOT NULL,
+            UNIQUE INDEX uq_refresh_jobs_active (active),
+            INDEX idx_refresh_jobs_updated_at (updated_at)
+        )
+    """)
+
+
+def _repair_legacy_schema(cursor):
+    # Databases that ran migrations 2 and 3 before they fixed column types
+    # and dropped the old name index
+    _fix_numeric_column_types(cursor)
+    _drop_legacy_name_index(cursor)
+
+
+MIGRATIONS = [
+    (1, "create countries table", _create_countries),
+    (2, "upgrade legacy countries columns", _upgrade_legacy_columns),
+    (3, "add name, filter and GDP indexes", _add_country_indexes),
+    (4, "add content hashes and dataset_meta for incremental refresh", _add_refresh_tracking),
+    (5, "add ISO alpha-2/alpha-3 codes for name lookups", _add_iso_codes),
+    (6, "add a shared dataset version for multi-worker serving", _add_dataset_version),
+    (7, "add dataset_meta.updated_at for Last-Modified headers", _add_dataset_updated_at),
+    (8, "add refresh_jobs for job status shared between workers", _create_refresh_jobs),
+    (9, "fix legacy numeric column types and drop the old name index", _repair_legacy_schema),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def get_schema_version(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def run_migrations(conn):
+    """Apply pending migrations in order and return the list of versions applied."""
+    cursor = conn.cursor()
+    applied = []
+    try:
+        if get_schema_version(cursor) >= LATEST_VERSION:
+            return applied
+
+        # Several workers may boot at once; only one of them migrates
+        cursor.execute("SELECT GET_LOCK('schema_migrations', 30)")
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for the schema migration lock")
+        try:
+            current = get_schema_version(cursor)
+            for version, description, migrate in MIGRATIONS:
+                if version <= current:
+                    continue
+                started = time.monotonic()
+                migrate(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                conn.commit()
+                applied.append(version)
+                print(f"🛠️ Applied migration {version}: {description} ({time.monotonic() - started:.2f}s)")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+            cursor.fetchone()
+    finally:
+        cursor.close()
+    return applied
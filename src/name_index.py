@@ -0,0 +1,81 @@
+import re
+import unicodedata
+
+# Common short names -> the official names restcountries uses
+ALIASES = {
+    "usa": "united states of america",
+    "us": "united states of america",
+    "united states": "united states of america",
+    "america": "united states of america",
+    "uk": "united kingdom of great britain and northern ireland",
+    "united kingdom": "united kingdom of great britain and northern ireland",
+    "great britain": "united kingdom of great britain and northern ireland",
+    "britain": "united kingdom of great britain and northern ireland",
+    "russia": "russian federation",
+    "south korea": "korea (republic of)",
+    "north korea": "korea (democratic people's republic of)",
+    "iran": "iran (islamic republic of)",
+    "vietnam": "viet nam",
+    "syria": "syrian arab republic",
+    "bolivia": "bolivia (plurinational state of)",
+    "venezuela": "venezuela (bolivarian republic of)",
+    "tanzania": "tanzania, united republic of",
+    "laos": "lao people's democratic republic",
+    "moldova": "moldova (republic of)",
+    "ivory coast": "cote d'ivoire",
+    "czechia": "czech republic",
+    "dr congo": "congo (democratic republic of the)",
+    "drc": "congo (democratic republic of the)",
+    "democratic republic of the congo": "congo (democratic republic of the)",
+    "palestine": "palestine, state of",
+    "micronesia": "micronesia (federated states of)",
+    "macedonia": "north macedonia",
+    "brunei": "brunei darussalam",
+    "cape verde": "cabo verde",
+    "swaziland": "eswatini",
+    "burma": "myanmar",
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_name(name):
+    """Casefold, strip accents and tidy whitespace/apostrophes: "  Côte D’Ivoire " -> "cote d'ivoire"."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    stripped = stripped.replace("’", "'").replace("‘", "'")
+    return _SPACES.sub(" ", stripped).strip().casefold()
+
+
+class NameIndex:
+    """
+    O(1) country lookup by name, accent/case variant, ISO alpha-2/alpha-3 code or alias.
+
+    Keys map to row positions, so rows can be any sequence of row dicts,
+    including a ColumnarTable that builds them on demand.
+    """
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._by_key = {}
+        by_name, by_code = {}, {}
+        for position, row in enumerate(rows):
+            if row.get("name"):
+                by_name[normalize_name(row["name"])] = position
+            for code_field in ("alpha2_code", "alpha3_code"):
+                code = row.get(code_field)
+                if code:
+                    by_code[code.casefold()] = position
+        # Later writes win: names override codes, codes override aliases
+        for alias, target in ALIASES.items():
+            if target in by_name:
+                self._by_key[alias] = by_name[target]
+        self._by_key.update(by_code)
+        self._by_key.update(by_name)
+
+    def lookup(self, name):
+        position = self._by_key.get(normalize_name(name))
+        return None if position is None else self._rows[position]
+
+    def __len__(self):
+        return len(self._by_key)
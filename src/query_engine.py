@@ -0,0 +1,127 @@
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from src.name_index import normalize_name
+
+# "mysql" sends every /countries query to the database, "memory" answers them from ColumnarTable
+QUERY_ENGINE = os.getenv("QUERY_ENGINE", "mysql")
+
+# column -> array typecode; NULLs are tracked in a separate bitmap
+NUMERIC_COLUMNS = {"id": "q", "population": "q", "exchange_rate": "d", "estimated_gdp": "d"}
+INTERNED_COLUMNS = ("region", "currency_code", "currency_name")
+FILTER_COLUMNS = ("region", "currency_code")
+SORTED_COLUMNS = ("id", "name", "population", "estimated_gdp")
+
+
+def _sort_value(column, value):
+    # Names compare like the utf8mb4_unicode_ci column: ignoring case and accents
+    return normalize_name(value) if column == "name" else value
+
+
+def _sort_key(column, value, row_id):
+    """MySQL order for ASC: NULLs first, then by value, then by id."""
+    if value is None:
+        return (False, "" if column == "name" else 0, row_id)
+    return (True, _sort_value(column, value), row_id)
+
+
+class NumericColumn:
+    __slots__ = ("values", "nulls")
+
+    def __init__(self, typecode, values):
+        self.nulls = 0
+        for i, value in enumerate(values):
+            if value is None:
+                self.nulls |= 1 << i
+        self.values = array(typecode, (0 if v is None else v for v in values))
+
+    def __getitem__(self, i):
+        return None if self.nulls >> i & 1 else self.values[i]
+
+
+class ColumnarTable:
+    """
+    Immutable, column-oriented copy of the countries table.
+
+    Numbers sit in typed arrays and repeated strings are interned, so the
+    whole table is a handful of objects rather than one dict per row. Region
+    and currency filters are integer bitmaps (bit i = row i) that combine
+    with a single AND, and every sortable column keeps a presorted row order,
+    so filters, sorts and keyset pages never touch the database. A new table
+    is built for each dataset version; readers keep whichever one they
+    grabbed, so a refresh swaps it in atomically.
+    """
+
+    def __init__(self, rows, fields):
+        self.fields = tuple(fields)
+        self.size = len(rows)
+        self.columns = {}
+        for field in self.fields:
+            values = [row.get(field) for row in rows]
+            if field in NUMERIC_COLUMNS:
+                self.columns[field] = NumericColumn(NUMERIC_COLUMNS[field], values)
+            elif field in INTERNED_COLUMNS:
+                self.columns[field] = tuple(sys.intern(v) if isinstance(v, str) else v for v in values)
+            else:
+                self.columns[field] = tuple(values)
+
+        # filter column -> {casefolded value: bitmap}
+        self.bitmaps = {}
+        for field in FILTER_COLUMNS:
+            bitmaps = {}
+            for i, value in enumerate(self.columns[field]):
+                if value is not None:
+                    key = normalize_name(value)
+                    bitmaps[key] = bitmaps.get(key, 0) | 1 << i
+            self.bitmaps[field] = bitmaps
+
+        # sort column -> (row positions in ASC order, their sort keys)
+        self.orders = {}
+        ids = self.columns["id"]
+        for field in SORTED_COLUMNS:
+            column = self.columns[field]
+            keys = sorted((_sort_key(field, column[i], ids[i]), i) for i in range(self.size))
+            self.orders[field] = (array("l", (i for _, i in keys)), [key for key, _ in keys])
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        """Row i as a dict, rebuilt from the columns."""
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        return {field: self.columns[field][i] for field in self.fields}
+
+    def _mask(self, region, currency):
+        mask = (1 << self.size) - 1
+        for field, value in (("region", region), ("currency_code", currency)):
+            if value:
+                mask &= self.bitmaps[field].get(normalize_name(value), 0)
+        return mask
+
+    def _positions(self, column, direction, after):
+        """Row positions in sort order, starting right after the keyset position."""
+        positions, keys = self.orders[column]
+        if direction == "ASC":
+            start = bisect_right(keys, _sort_key(column, *after)) if after is not None else 0
+            return (positions[i] for i in range(start, self.size))
+        end = bisect_left(keys, _sort_key(column, *after)) if after is not None else self.size
+        return (positions[i] for i in range(end - 1, -1, -1))
+
+    def query(self, region=None, currency=None, sort_column="id", direction="ASC",
+              columns=None, limit=None, after=None):
+        """Same rows, order and keyset semantics as the SQL built by fetch_countries._select_sql()."""
+        mask = self._mask(region, currency)
+        if after is not None and sort_column == "id":
+            after = (after[1], after[1])
+        selected = [(field, self.columns[field]) for field in (columns or self.fields)]
+        results = []
+        if not mask:
+            return results
+        for i in self._positions(sort_column, direction, after):
+            if mask >> i & 1:
+                results.append({field: column[i] for field, column in selected})
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
@@ -0,0 +1,135 @@
+import datetime
+import decimal
+import gzip
+import hashlib
+import json
+import os
+from flask import Response, request
+from src.cache import QueryCache, get_dataset_version
+from src.fetch_countries import get_last_modified
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))  # bytes; smaller bodies go out as is
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 6))
+# Sent with successful read responses; "public, no-cache" lets CDNs store them but revalidate via ETag
+API_CACHE_CONTROL = os.getenv("API_CACHE_CONTROL", "public, no-cache")
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _default(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize obj to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(body):
+    # Content only: the dataset version counter differs between worker processes
+    return hashlib.sha1(body).hexdigest()[:20]
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class EncodedBody:
+    """
+    A serialized response body and its compressed variants.
+
+    Each variant is compressed on first request and kept with the body, so it
+    lives exactly as long as the cache entry holding the body.
+    """
+
+    __slots__ = ("body", "status", "etag", "last_modified", "_encoded")
+
+    def __init__(self, body, status=200, etag=None, last_modified=None):
+        self.body = body
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        data = self._encoded.get(encoding)
+        if data is None:
+            # Racing threads may both compress; either result is correct
+            data = self._encoded[encoding] = _compress(self.body, encoding)
+        return data
+
+    def _not_modified(self, etag):
+        # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110)
+        if request.if_none_match:
+            return request.if_none_match.contains(etag)
+        since = request.if_modified_since
+        return bool(since and self.last_modified and self.last_modified.replace(microsecond=0) <= since)
+
+    def to_response(self, mimetype="application/json", cache_control=API_CACHE_CONTROL):
+        """Negotiate Content-Encoding and answer conditional requests."""
+        encoding = None
+        if len(self.body) >= COMPRESS_MIN_SIZE:
+            encoding = request.accept_encodings.best_match(ENCODINGS)
+        # Each representation needs its own strong validator
+        etag = f"{self.etag}-{encoding}" if encoding and self.etag else self.etag
+
+        if self.status == 200 and self._not_modified(etag):
+            response = Response(status=304)
+        else:
+            body = self.encoded(encoding) if encoding else self.body
+            response = Response(body, status=self.status, mimetype=mimetype)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+
+        if etag:
+            response.set_etag(etag)
+        if len(self.body) >= COMPRESS_MIN_SIZE:
+            response.vary.add("Accept-Encoding")
+        if self.status == 200:
+            if self.last_modified:
+                response.last_modified = self.last_modified
+            if cache_control:
+                response.headers["Cache-Control"] = cache_control
+        return response
+
+
+# Serialized bodies, keyed like the query cache and invalidated by the same dataset version
+response_cache = QueryCache()
+
+
+def cached_json_response(key, build):
+    """
+    Serve a JSON response from pre-serialized bytes.
+
+    build() returns (payload, status) and only runs on a cache miss. Each body
+    carries a strong ETag and the dataset's Last-Modified time; matching
+    conditional requests get a bodiless 304. Bodies above COMPRESS_MIN_SIZE
+    are sent gzip or brotli compressed when the client accepts it.
+    """
+    version = get_dataset_version()
+    hit, entry = response_cache.get(key, version)
+    if not hit:
+        payload, status = build()
+        body = dumps(payload)
+        entry = EncodedBody(body, status, make_etag(body), get_last_modified())
+        response_cache.set(key, entry, version)
+    return entry.to_response()
@@ -1,8 +1,10 @@
 import os
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify
 from flask_restx import Api, Resource, fields, Namespace
-from src.app import create_tables, refresh_countries, get_countries, get_status
-from src.image_generator import generate_summary_image  # optional
+from src.db_connection import initialize_db
+from src.fetch_countries import fetch_and_store_countries, get_countries, get_status, get_country_by_name, delete_country_by_name
+from src.jobs import refresh_queue
+from src.image_generator import get_summary_image, request_render, IMAGE_MAX_AGE
 
 app = Flask(__name__)
 api = Api(
@@ -57,38 +59,57 @@ class CountryByName(Resource):
     @ns.marshal_with(country_model)
     def get(self, name):
         """Get a single country by name"""
-        country = next((c for c in get_countries() if c["name"].lower() == name.lower()), None)
+        country = get_country_by_name(name)
         if not country:
             api.abort(404, f"Country '{name}' not found")
         return country
 
     def delete(self, name):
         """Delete a country by name"""
-        from src.app import delete_country_by_name
         success = delete_country_by_name(name)
         if not success:
             api.abort(404, f"Country '{name}' not found")
         return {"message": f"{name} deleted successfully"}, 200
 
+def refresh_and_render(progress):
+    result = fetch_and_store_countries(progress)
+    if result["success"]:
+        # Re-render the summary image off the request path
+        request_render()
+    return result
+
+
 @ns.route("/refresh")
 class RefreshCountries(Resource):
     def post(self):
-        """Refresh all countries and exchange rates"""
-        success = refresh_countries()
-        if not success:
-            api.abort(503, "External data source unavailable")
-        # Generate summary image
-        generate_summary_image()
-        return {"message": "Countries refreshed successfully"}, 200
+        """Queue a refresh of all countries and exchange rates"""
+        job, created = refresh_queue.submit(refresh_and_render)
+        return {"job_id": job["job_id"], "status": job["status"], "merged": not created}, 202
+
+
+@ns.route("/refresh/<string:job_id>")
+class RefreshJob(Resource):
+    def get(self, job_id):
+        """Get status and progress of a refresh job"""
+        job = refresh_queue.get(job_id)
+        if job is None:
+            api.abort(404, f"Refresh job '{job_id}' not found")
+        return job
 
 @ns.route("/image")
 class CountryImage(Resource):
     def get(self):
         """Serve summary image"""
-        image_path = "cache/summary.png"
-        if not os.path.exists(image_path):
+        png, etag = get_summary_image()
+        if png is None:
             api.abort(404, "Summary image not found")
-        return send_file(image_path, mimetype="image/png")
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(png, mimetype="image/png")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = f"public, max-age={IMAGE_MAX_AGE}"
+        return response
 
 # -----------------------------
 # Status endpoint
@@ -111,6 +132,6 @@ def home():
 # Main
 # -----------------------------
 if __name__ == "__main__":
-    create_tables()
-    refresh_countries()  # optional on startup
+    initialize_db()
+    fetch_and_store_countries()  # optional on startup
     app.run(debug=True, port=int(os.getenv("PORT", 5000)))
@@ -0,0 +1,41 @@
+import os
+import threading
+
+REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL", 0))  # seconds between incremental refreshes, 0 = off
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+def _loop(queue, task, interval, stop, skip_if):
+    while not stop.wait(interval):
+        try:
+            if skip_if is not None and skip_if():
+                continue
+        except Exception as e:
+            print(f"⚠️ Scheduler check failed, refreshing anyway: {e}")
+        job, created = queue.submit(task, mode="incremental")
+        if created:
+            print(f"⏰ Scheduled incremental refresh queued (job {job['job_id']})")
+
+
+def start_scheduler(queue, task, interval=REFRESH_INTERVAL, skip_if=None):
+    """
+    Queue task as an incremental refresh every interval seconds.
+
+    Runs through the refresh job queue, so a scheduled run merges with any
+    refresh already in progress. A tick is skipped when skip_if() is true,
+    e.g. because another worker process refreshed moments ago. Returns the
+    stop event, or None if disabled.
+    """
+    global _scheduler
+    if interval <= 0:
+        return None
+    with _lock:
+        if _scheduler is None:
+            stop = threading.Event()
+            thread = threading.Thread(target=_loop, args=(queue, task, interval, stop, skip_if),
+                                      name="refresh-scheduler", daemon=True)
+            thread.start()
+            _scheduler = stop
+    return _scheduler
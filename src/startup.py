@@ -0,0 +1,41 @@
+import os
+import time
+
+APP_ENV = os.getenv("APP_ENV", "development")
+PRODUCTION = APP_ENV == "production"
+PREFORK = False  # set by wsgi.py before the app is imported into a pre-forking server
+
+_started = _last = time.perf_counter()
+_phases = []  # [(name, seconds)] in the order they finished
+_ready_at = None
+
+
+def checkpoint(name):
+    """Record the time since the previous checkpoint (or process start) as phase name."""
+    global _last
+    now = time.perf_counter()
+    _phases.append((name, now - _last))
+    _last = now
+
+
+def mark_ready():
+    global _ready_at
+    if _ready_at is None:
+        _ready_at = time.perf_counter()
+
+
+def report():
+    """Startup phases in ms, plus the time from first import to ready (or so far)."""
+    total = (_ready_at or time.perf_counter()) - _started
+    return {
+        "app_env": APP_ENV,
+        "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in _phases},
+        "total_ms": round(total * 1000, 1),
+        "ready": _ready_at is not None,
+    }
+
+
+def print_report():
+    info = report()
+    steps = ", ".join(f"{name} {ms}ms" for name, ms in info["phases_ms"].items())
+    print(f"🚦 Startup ({info['app_env']}) took {info['total_ms']}ms: {steps}")
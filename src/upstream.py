@@ -0,0 +1,254 @@
+import codecs
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", 5))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", 30))
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", 3))
+UPSTREAM_BACKOFF = float(os.getenv("UPSTREAM_BACKOFF", 0.5))  # base seconds for jittered exponential backoff
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", 4))
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "cache")
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# -----------------------------
+# HTTP
+# -----------------------------
+def get_session():
+    """Process-wide requests session, so upstream connections are kept alive and reused."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=UPSTREAM_POOL_SIZE, pool_maxsize=UPSTREAM_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def request_with_retries(url, headers=None, stream=False, retries=UPSTREAM_RETRIES):
+    """
+    GET url with timeouts, retrying connection errors, timeouts and 429/5xx
+    replies with full-jitter exponential backoff. Returns the last response.
+    """
+    import requests
+    session = get_session()
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, headers=headers, stream=stream,
+                                   timeout=(UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT))
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            response.close()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        time.sleep(random.uniform(0, UPSTREAM_BACKOFF * 2 ** attempt))
+
+
+# -----------------------------
+# Incremental JSON parsing
+# -----------------------------
+def iter_json_array(chunks):
+    """
+    Yield the elements of a top-level JSON array of objects from an iterable of
+    byte chunks, without holding the whole document in memory.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, started = "", 0, False
+    chunks = iter(chunks)
+    exhausted = False
+
+    while True:
+        # Skip whitespace and separators
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+            else:
+                # A value is only complete once its delimiter arrived: "[12" may go on as "34]"
+                after = end
+                while after < len(buffer) and buffer[after] in " \t\r\n":
+                    after += 1
+                if after < len(buffer):
+                    if buffer[after] not in ",]":
+                        raise ValueError(f"Expected ',' or ']' at position {after}")
+                    if not isinstance(item, dict):
+                        raise ValueError("Expected a JSON array of objects")
+                    yield item
+                    pos = end
+                    continue
+                if exhausted:
+                    raise ValueError("Unexpected end of JSON array")
+        elif exhausted:
+            raise ValueError("Unexpected end of JSON array")
+
+        # Need more data: drop what has been consumed and read the next chunk
+        buffer, pos = buffer[pos:], 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer += utf8.decode(b"", final=True)
+        else:
+            buffer += utf8.decode(chunk)
+
+
+# -----------------------------
+# Snapshots
+# -----------------------------
+def _snapshot_paths(name):
+    base = os.path.join(SNAPSHOT_DIR, f"{name}_snapshot")
+    return base + ".json.gz", base + ".meta.json"
+
+
+def load_snapshot_meta(name):
+    _, meta_path = _snapshot_paths(name)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def has_snapshot(name):
+    return os.path.exists(_snapshot_paths(name)[0])
+
+
+def load_snapshot(name):
+    data_path, _ = _snapshot_paths(name)
+    with gzip.open(data_path, "rb") as f:
+        return json.load(f)
+
+
+def _write_meta(name, meta):
+    _, meta_path = _snapshot_paths(name)
+    fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+class SnapshotWriter:
+    """Gzip bytes into a temp file and atomically replace the snapshot on commit()."""
+
+    def __init__(self, name):
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        self.name = name
+        fd, self._tmp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".json.gz.tmp")
+        self._file = gzip.GzipFile(fileobj=os.fdopen(fd, "wb"), mode="wb")
+        self._raw = self._file.fileobj
+
+    def write(self, data):
+        self._file.write(data)
+
+    def commit(self, meta):
+        self._file.close()
+        self._raw.close()
+        os.replace(self._tmp_path, _snapshot_paths(self.name)[0])
+        _write_meta(self.name, {**meta, "saved_at": time.time()})
+
+    def discard(self):
+        try:
+            self._file.close()
+            self._raw.close()
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.unlink(self._tmp_path)
+
+
+def save_snapshot(name, obj, meta=None):
+    writer = SnapshotWriter(name)
+    try:
+        writer.write(json.dumps(obj).encode("utf-8"))
+        writer.commit(meta or {})
+    except Exception:
+        writer.discard()
+        raise
+
+
+# -----------------------------
+# Countries
+# -----------------------------
+def _tee(chunks, writer):
+    for chunk in chunks:
+        writer.write(chunk)
+        yield chunk
+
+
+def fetch_countries(url, conditional=True, offline=False):
+    """
+    Fetch the restcountries array.
+
+    Returns (source, countries) where source is "upstream" for a fresh
+    download, "not_modified" when the server answered 304 to our stored
+    ETag/Last-Modified (countries then come from the local snapshot) or
+    "snapshot" when upstream failed and the last good payload was used.
+    The body is parsed as it streams in and written to the compressed
+    snapshot at the same time; the snapshot only replaces the previous one
+    once the whole array parsed cleanly. Only the raw body is never held
+    in memory: the parsed countries are returned as one list, so a failure
+    halfway through can still fall back to the snapshot. offline=True
+    skips the network.
+    """
+    if offline:
+        return "snapshot", load_snapshot("countries")
+    meta = load_snapshot_meta("countries") if has_snapshot("countries") else {}
+    headers = {"Accept-Encoding": "gzip"}
+    if conditional and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if conditional and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = request_with_retries(url, headers=headers, stream=True)
+        if response.status_code == 304:
+            response.close()
+            return "not_modified", load_snapshot("countries")
+        if response.status_code != 200:
+            response.close()
+            raise RuntimeError(f"Failed to fetch data (HTTP {response.status_code})")
+
+        writer = SnapshotWriter("countries")
+        try:
+            with response:
+                countries = list(iter_json_array(_tee(response.iter_content(CHUNK_SIZE), writer)))
+            writer.commit({
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "url": url,
+            })
+        except Exception:
+            writer.discard()
+            raise
+        return "upstream", countries
+    except Exception as e:
+        if has_snapshot("countries"):
+            print(f"⚠️ Upstream fetch failed ({e}); using the local snapshot")
+            return "snapshot", load_snapshot("countries")
+        raise
@@ -0,0 +1,110 @@
+import itertools
+import sqlite3
+import pytest
+from src.dataset import DatasetSnapshot
+from src.fetch_countries import COUNTRY_FIELDS, SORT_OPTIONS, SORT_SPECS, _select_sql
+from src.query_engine import ColumnarTable
+
+REGIONS = ["Africa", "Europe", "Asia", None]
+CURRENCIES = ["NGN", "EUR", "USD", None]
+
+
+def _rows():
+    rows = []
+    for i in range(1, 41):
+        # Repeated populations and GDPs (and NULLs) so ties fall through to id
+        rows.append({
+            "id": i * 3,  # gaps, like ids after deletes
+            "name": f"Country {chr(65 + (i * 7) % 26)}{i:02d}",
+            "capital": f"Capital {i}",
+            "region": REGIONS[i % len(REGIONS)],
+            "population": None if i % 9 == 0 else (i * 37) % 11 * 1000,
+            "flag": None,
+            "currency_name": None,
+            "currency_code": CURRENCIES[i % 3 if i % 5 else 3],
+            "alpha2_code": f"{chr(65 + i % 26)}{chr(65 + i // 26)}",
+            "alpha3_code": None,
+            "exchange_rate": None if i % 5 == 0 else 1.5 * (i % 4),
+            "estimated_gdp": None if i % 4 == 0 else float((i * 13) % 7 * 1000),
+            "last_refreshed_at": "2024-01-01 00:00:00",
+        })
+    return rows
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return _rows()
+
+
+@pytest.fixture(scope="module")
+def table(rows):
+    return ColumnarTable(rows, COUNTRY_FIELDS)
+
+
+@pytest.fixture(scope="module")
+def db(rows):
+    # NOCASE stands in for the case-insensitive MySQL collation; NULLs sort first
+    # ascending and last descending in both
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE countries (id INTEGER PRIMARY KEY, name TEXT COLLATE NOCASE, "
+                 "capital TEXT, region TEXT COLLATE NOCASE, population INTEGER, flag TEXT, "
+                 "currency_name TEXT, currency_code TEXT COLLATE NOCASE, alpha2_code TEXT, alpha3_code TEXT, "
+                 "exchange_rate REAL, estimated_gdp REAL, last_refreshed_at TEXT)")
+    placeholders = ", ".join("?" * len(COUNTRY_FIELDS))
+    conn.executemany(f"INSERT INTO countries ({', '.join(COUNTRY_FIELDS)}) VALUES ({placeholders})",
+                     [tuple(row[f] for f in COUNTRY_FIELDS) for row in rows])
+    yield conn
+    conn.close()
+
+
+def _sql_query(db, *args):
+    query, params = _select_sql(*args)
+    return [dict(row) for row in db.execute(query.replace("%s", "?"), params)]
+
+
+def _memory_query(table, region, currency, sort, columns=None, limit=None, after=None):
+    column, direction = SORT_SPECS.get(sort, ("id", "ASC"))
+    return table.query(region, currency, column, direction, columns, limit, after)
+
+
+FILTERS = [(None, None), ("africa", None), (None, "eur"), ("europe", "usd"), ("nowhere", None)]
+
+
+@pytest.mark.parametrize("sort", [None, *SORT_OPTIONS])
+@pytest.mark.parametrize("region, currency", FILTERS)
+def test_full_results_match_sql(table, db, sort, region, currency):
+    assert _memory_query(table, region, currency, sort) == _sql_query(db, region, currency, sort)
+
+
+@pytest.mark.parametrize("sort", [None, *SORT_OPTIONS])
+@pytest.mark.parametrize("region, currency", FILTERS[:3])
+@pytest.mark.parametrize("limit", [1, 4, 7])
+def test_keyset_pages_match_sql(table, db, sort, region, currency, limit):
+    column, _ = SORT_SPECS.get(sort, ("id", "ASC"))
+    columns = ("id", "name", column) if column not in ("id", "name") else ("id", "name")
+    walked, after = [], None
+    for _ in range(100):
+        page = _memory_query(table, region, currency, sort, columns, limit, after)
+        assert page == _sql_query(db, region, currency, sort, columns, limit, after)
+        walked.extend(page)
+        if len(page) < limit:
+            break
+        after = (page[-1][column], page[-1]["id"])
+    assert walked == _memory_query(table, region, currency, sort, columns)
+
+
+def test_cursor_positioned_on_null_gdp(table, db, rows):
+    null_gdp = [row for row in rows if row["estimated_gdp"] is None]
+    for sort, row in itertools.product(("gdp_asc", "gdp_desc"), null_gdp):
+        after = (None, row["id"])
+        assert _memory_query(table, None, None, sort, after=after) == _sql_query(db, None, None, sort, None, None, after)
+
+
+def test_snapshot_with_table_drops_the_row_dicts(rows, table):
+    snapshot = DatasetSnapshot(rows, table)
+    assert snapshot.rows is table
+    assert len(snapshot) == len(rows)
+    assert snapshot.name_index.lookup(rows[5]["name"].upper()) == rows[5]
+    assert snapshot.name_index.lookup(rows[5]["alpha2_code"].lower()) == rows[5]
+    assert snapshot.name_index.lookup("nowhere") is None
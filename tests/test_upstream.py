@@ -0,0 +1,55 @@
+import json
+import pytest
+from src.upstream import iter_json_array
+
+COUNTRIES = [
+    {"name": "Côte d'Ivoire", "region": "Africa", "population": 26378275},
+    {"name": "Åland Islands", "region": "Europe", "population": 28875},
+    {"name": "日本", "region": "Asia", "population": 125836021},
+]
+
+
+def _split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+def test_any_chunk_size(size):
+    data = json.dumps(COUNTRIES, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(_split(data, size))) == COUNTRIES
+
+
+def test_multibyte_character_split_across_chunks():
+    data = json.dumps([{"name": "日本"}], ensure_ascii=False).encode("utf-8")
+    cut = data.index("日".encode("utf-8")) + 1  # inside the 3-byte sequence
+    assert list(iter_json_array([data[:cut], data[cut:]])) == [{"name": "日本"}]
+
+
+def test_whitespace_and_empty_chunks():
+    chunks = [b"", b"  [\n", b"", b'{"a": 1}', b" ,\t", b'{"a": 2}', b"\n]", b""]
+    assert list(iter_json_array(chunks)) == [{"a": 1}, {"a": 2}]
+
+
+def test_empty_array():
+    assert list(iter_json_array([b"[", b"]"])) == []
+
+
+def test_number_split_across_chunks_is_not_two_values():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b"[12", b"34]"]))
+
+
+def test_rejects_items_that_are_not_objects():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[{"a": 1}, "b"]']))
+
+
+def test_rejects_missing_comma():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[{"a": 1} {"a": 2}]']))
+
+
+@pytest.mark.parametrize("chunks", [[b'{"a": 1}'], [b'[{"a": 1},'], [b'[{"a": 1']])
+def test_rejects_non_arrays_and_truncated_input(chunks):
+    with pytest.raises(ValueError):
+        list(iter_json_array(chunks))